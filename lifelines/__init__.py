@@ -1,2 +1,3 @@
 # -*- coding: utf-8 -*-
-from .estimation import KaplanMeierFitter, NelsonAalenFitter, AalenAdditiveFitter, BreslowFlemingHarringtonFitter, CoxPHFitter
+from .estimation import KaplanMeierFitter, NelsonAalenFitter, AalenAdditiveFitter, BreslowFlemingHarringtonFitter, CoxPHFitter, \
+    TurnbullFitter
@@ -1,21 +1,87 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import os
+from collections import OrderedDict
+
 import pandas as pd
-from pkg_resources import resource_filename
+
+DATASETS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# parsed datasets, most recently used last. Callers get copies, so the cached frames are never mutated.
+_cache = OrderedDict()
+CACHE_SIZE = 32
 
 
-def load_dataset(filename, usecols=None):
+def cache_dir():
+    """
+    The directory of the on-disk cache: $LIFELINES_CACHE_DIR if set, else ~/.cache/lifelines.
+    """
+    return os.environ.get('LIFELINES_CACHE_DIR',
+                          os.path.join(os.path.expanduser('~'), '.cache', 'lifelines'))
+
+
+def clear_cache():
+    """
+    Empty the in-process cache of load_dataset. The on-disk cache is left as is.
+    """
+    _cache.clear()
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _read_csv_through_disk_cache(path, usecols):
+    key = _file_hash(path)
+    if usecols is not None:
+        key += '-' + hashlib.sha1(repr(list(usecols)).encode('utf-8')).hexdigest()
+    pickle_path = os.path.join(cache_dir(), '%s-%s.pkl' % (os.path.basename(path), key))
+    if os.path.exists(pickle_path):
+        try:
+            return pd.read_pickle(pickle_path)
+        except Exception:
+            pass  # a corrupt or incompatible pickle: parse the csv again and overwrite it.
+
+    df = pd.read_csv(path, usecols=usecols)
+    try:
+        if not os.path.isdir(cache_dir()):
+            os.makedirs(cache_dir())
+        # write then rename, so that concurrent readers never see a partial file.
+        tmp_path = '%s.%d.tmp' % (pickle_path, os.getpid())
+        df.to_pickle(tmp_path)
+        os.rename(tmp_path, pickle_path)
+    except (IOError, OSError):
+        pass  # the disk cache is best effort.
+    return df
+
+
+def load_dataset(filename, usecols=None, disk_cache=False):
     '''
-    Load a dataset from lifelines.datasets
+    Load a dataset from lifelines.datasets. Parsed datasets are kept in an in-process
+    cache of the CACHE_SIZE most recently used, and a copy is returned, so callers can modify it freely.
 
     Parameters:
     filename : for example "larynx.csv"
     usecols : list of columns in file to use
+    disk_cache : also keep the parsed dataset as a pickle in cache_dir(), keyed by the hash of
+        the file, so that later processes skip parsing the csv.
 
     Returns : Pandas dataframe
     '''
-    return pd.read_csv(resource_filename('lifelines',
-                                         'datasets/' + filename),
-                       usecols=usecols)
+    key = (filename, None if usecols is None else tuple(usecols))
+    if key in _cache:
+        df = _cache.pop(key)
+    else:
+        path = os.path.join(DATASETS_DIR, filename)
+        if disk_cache:
+            df = _read_csv_through_disk_cache(path, usecols)
+        else:
+            df = pd.read_csv(path, usecols=usecols)
+    _cache[key] = df
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return df.copy()
 
 
 def load_canadian_senators(usecols=None):
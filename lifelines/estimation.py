@@ -1,17 +1,18 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
+from functools import reduce
 
 import numpy as np
 from numpy.linalg import LinAlgError, inv, solve, norm
 from numpy import dot, exp
 from numpy.random import beta
-from scipy.integrate import trapz
-import scipy.stats as stats
+from multiprocessing import Pool, cpu_count
 import pandas as pd
 
-from lifelines.plotting import plot_estimate, plot_regressions
-from lifelines.utils import survival_table_from_events, inv_normal_cdf, \
-    epanechnikov_kernel, StatError, coalesce, normalize, significance_code
+from lifelines.plotting import plot_estimate, plot_regressions, shaded_plot
+from lifelines.utils import survival_table_from_events, EventTable, inv_normal_cdf, \
+    epanechnikov_kernel, banded_kernel_smoothing, StatError, coalesce, normalize, significance_code, \
+    qth_survival_times, median_survival_times
 from lifelines.progress_bar import progress_bar
 from lifelines.utils import concordance_index
 
@@ -27,6 +28,16 @@ class BaseFitter(object):
             s = """<lifelines.%s>""" % classname
         return s
 
+    def _lazy(self, name, key, compute):
+        """
+        Returns the value of the property name, computed by compute() on first access and cached
+        until key (ex: the alpha it depends on) changes. Fitting empties the cache.
+        """
+        cache = self.__dict__.setdefault('_lazy_cache', {})
+        if name not in cache or cache[name][0] != key:
+            cache[name] = (key, compute())
+        return cache[name][1]
+
 
 class NelsonAalenFitter(BaseFitter):
 
@@ -45,15 +56,10 @@ class NelsonAalenFitter(BaseFitter):
         self.alpha = alpha
         self.nelson_aalen_smoothing = nelson_aalen_smoothing
 
-        if self.nelson_aalen_smoothing:
-            self._variance_f = self._variance_f_smooth
-            self._additive_f = self._additive_f_smooth
-        else:
-            self._variance_f = self._variance_f_discrete
-            self._additive_f = self._additive_f_discrete
+        self._additive_f, self._variance_f = _nelson_aalen_increments(nelson_aalen_smoothing)
 
     def fit(self, durations, event_observed=None, timeline=None, entry=None,
-            label='NA-estimate', alpha=None, ci_labels=None):
+            label='NA-estimate', alpha=None, ci_labels=None, timeline_resolution=None):
         """
         Parameters:
           duration: an array, or pd.Series, of length n -- duration subject was observed for
@@ -65,26 +71,124 @@ class NelsonAalenFitter(BaseFitter):
              If None, defaults to all 0 (all birth events observed.)
           label: a string to name the column of the estimate.
           alpha: the alpha value in the confidence intervals. Overrides the initializing
-             alpha for this call to fit only.
+             alpha, and is used by later calls to confidence_interval_ too.
           ci_labels: add custom column names to the generated confidence intervals
                 as a length-2 list: [<lower-bound name>, <upper-bound name>]. Default: <label>_lower_<alpha>
+          timeline_resolution: if not None, the timeline is the multiples of timeline_resolution spanning the
+             event times, rather than every event time. The estimates are still exact at these times, but they, and
+             everything computed from them, have one row per bucket rather than per event time.
 
         Returns:
           self, with new properties like 'cumulative_hazard_'.
 
         """
 
-        v = preprocess_inputs(durations, event_observed, timeline, entry)
+        v = preprocess_inputs(durations, event_observed, timeline, entry, timeline_resolution)
+        self.durations, self.event_observed, self.timeline, self.entry, self.event_table = v
+        self._timeline_resolution = timeline_resolution
+        return self._fit(label, alpha, ci_labels)
+
+    def fit_from_event_table(self, event_table, timeline=None, label='NA-estimate', alpha=None, ci_labels=None,
+                             observed_col='observed', censored_col='censored', entrance_col='entrance'):
+        """
+        Fit from pre-aggregated counts, rather than from one row per individual.
+
+        Parameters:
+          event_table: a DataFrame indexed by time, with the number of observed deaths and of
+             censorships at each time, and optionally the number of individuals entering the study
+             at each time. If there is no entrance column, everyone enters at time 0.
+             Also accepts a (merged) lifelines.utils.EventTable.
+          timeline: return the best estimate at the values in timelines (postively increasing)
+          label: a string to name the column of the estimate.
+          alpha: the alpha value in the confidence intervals. Overrides the initializing
+             alpha, and is used by later calls to confidence_interval_ too.
+          ci_labels: add custom column names to the generated confidence intervals
+                as a length-2 list: [<lower-bound name>, <upper-bound name>]. Default: <label>_lower_<alpha>
+          observed_col: the column of event_table with the number of observed deaths.
+          censored_col: the column of event_table with the number of censorships.
+          entrance_col: the column of event_table with the number of entrances, if any.
+
+        Returns:
+          self, with new properties like 'cumulative_hazard_'.
+
+        """
+        v = preprocess_event_table(event_table, timeline, observed_col, censored_col, entrance_col)
         self.durations, self.event_observed, self.timeline, self.entry, self.event_table = v
+        self._timeline_resolution = None
+        return self._fit(label, alpha, ci_labels)
+
+    def update(self, durations, event_observed=None, entry=None):
+        """
+        Add new observations to the fitted estimate, without reprocessing the ones it was fitted with:
+        they are merged into the event_table, and the estimates are only recomputed from the earliest
+        time the new observations affect onward, that is their earliest entry (0 if entry is None).
+        Like fit_from_event_table, the fit then only keeps the event_table: durations, event_observed
+        and entry are None.
+
+        Parameters:
+          duration: an array, or pd.Series, of length n -- duration subject was observed for
+          event_observed: an array, or pd.Series, of length n -- True if the the death was observed, False if the event
+             was lost (right-censored). Defaults all True if event_observed==None
+          entry: an array, or pd.Series, of length n -- relative time when a subject entered the study.
+             If None, defaults to all 0 (all birth events observed.)
+
+        Returns:
+          self, with updated properties like 'cumulative_hazard_'.
+
+        """
+        v = preprocess_update(self, durations, event_observed, entry)
+        self.durations, self.event_observed, self.timeline, self.entry, self.event_table, start = v
+        increments = _additive_increments(self.event_table, self._additive_f, self._variance_f, start, self._increments)
+        return self._fit(self._label, None, self._ci_labels, increments)
+
+    def fit_groups(self, durations, event_observed=None, groups=None, entry=None,
+                   label='NA-estimate', alpha=None, ci_labels=None, wide=False):
+        """
+        Fit one estimate per group in a single pass: the individuals are sorted once by (group, time),
+        and the estimates and their variances are segmented cumulative sums over the groups.
+
+        Parameters:
+          duration: an array, or pd.Series, of length n -- duration subject was observed for
+          event_observed: an array, or pd.Series, of length n -- True if the the death was observed, False if the event
+             was lost (right-censored). Defaults all True if event_observed==None
+          groups: (required) an array, or pd.Series, of length n -- the group of each subject.
+          entry: an array, or pd.Series, of length n -- relative time when a subject entered the study.
+             If None, defaults to all 0 (all birth events observed.)
+          label: a string to name the column of the estimate.
+          alpha: the alpha value in the confidence intervals. Default the initializing alpha.
+          ci_labels: add custom column names to the generated confidence intervals
+                as a length-2 list: [<lower-bound name>, <upper-bound name>]. Default: <label>_lower_<alpha>
+          wide: if True, return only the estimates, as a DataFrame with one column per group, indexed
+                by the times of all groups.
 
+        Returns:
+          a DataFrame indexed by (group, timeline), with the times of each group's event table, and
+          the estimate and confidence interval columns. See wide for the other format.
+
+        """
+        alpha = alpha if alpha else self.alpha
+        index, cumulative_hazard_, cumulative_sq_ = _grouped_additive_estimate(
+            durations, event_observed, groups, entry, self._additive_f, self._variance_f)
+        if ci_labels is None:
+            ci_labels = ["%s_upper_%.2f" % (label, alpha), "%s_lower_%.2f" % (label, alpha)]
+        assert len(ci_labels) == 2, "ci_labels should be a length 2 array."
+
+        upper, lower = _nelson_aalen_bounds(cumulative_hazard_, cumulative_sq_, alpha)
+        return _grouped_result(index, [cumulative_hazard_, upper, lower], [label] + list(ci_labels), wide)
+
+    def _fit(self, label, alpha, ci_labels, increments=None):
+        if increments is None:
+            increments = _additive_increments(self.event_table, self._additive_f, self._variance_f)
         cumulative_hazard_, cumulative_sq_ = _additive_estimate(self.event_table, self.timeline,
-                                                                self._additive_f, self._variance_f, False)
+                                                                self._additive_f, self._variance_f, False, increments)
 
         # esimates
         self._label = label
+        self.alpha = alpha if alpha else self.alpha
+        self._ci_labels, self._increments = ci_labels, increments
         self.cumulative_hazard_ = pd.DataFrame(cumulative_hazard_, columns=[self._label])
-        self.confidence_interval_ = self._bounds(cumulative_sq_[:, None], alpha if alpha else self.alpha, ci_labels)
         self._cumulative_sq = cumulative_sq_
+        self._lazy_cache = {}
 
         # estimation functions
         self.predict = _predict(self, "cumulative_hazard_", self._label)
@@ -98,69 +202,84 @@ class NelsonAalenFitter(BaseFitter):
 
         return self
 
+    @property
+    def confidence_interval_(self):
+        """
+        The confidence intervals of cumulative_hazard_, computed on first access and recomputed if alpha changes.
+        """
+        alpha = self.alpha
+        return self._lazy('confidence_interval_', (alpha, self._ci_labels),
+                          lambda: self._bounds(self._cumulative_sq.values[:, None], alpha, self._ci_labels))
+
     def _bounds(self, cumulative_sq_, alpha, ci_labels):
-        alpha2 = inv_normal_cdf(1 - (1 - alpha) / 2)
         df = pd.DataFrame(index=self.timeline)
 
         if ci_labels is None:
-            ci_labels = ["%s_upper_%.2f" % (self._label, self.alpha), "%s_lower_%.2f" % (self._label, self.alpha)]
+            ci_labels = ["%s_upper_%.2f" % (self._label, alpha), "%s_lower_%.2f" % (self._label, alpha)]
         assert len(ci_labels) == 2, "ci_labels should be a length 2 array."
         self.ci_labels = ci_labels
 
-        df[ci_labels[0]] = self.cumulative_hazard_.values * \
-            np.exp(alpha2 * np.sqrt(cumulative_sq_) / self.cumulative_hazard_.values)
-        df[ci_labels[1]] = self.cumulative_hazard_.values * \
-            np.exp(-alpha2 * np.sqrt(cumulative_sq_) / self.cumulative_hazard_.values)
+        df[ci_labels[0]], df[ci_labels[1]] = _nelson_aalen_bounds(self.cumulative_hazard_.values, cumulative_sq_, alpha)
         return df
 
     def _variance_f_smooth(self, population, deaths):
-        df = pd.DataFrame({'N': population, 'd': deaths})
-        return df.apply(lambda N_d: np.sum((1. / (N_d[0] - i) ** 2 for i in range(int(N_d[1])))), axis=1)
+        return _nelson_aalen_variance_smooth(population, deaths)
 
     def _variance_f_discrete(self, population, deaths):
-        return 1. * (population - deaths) * deaths / population ** 3
+        return _nelson_aalen_variance_discrete(population, deaths)
 
     def _additive_f_smooth(self, population, deaths):
-        df = pd.DataFrame({'N': population, 'd': deaths})
-        return df.apply(lambda N_d: np.sum((1. / (N_d[0] - i) for i in range(int(N_d[1])))), axis=1)
+        return _nelson_aalen_additive_smooth(population, deaths)
 
     def _additive_f_discrete(self, population, deaths):
-        return (1. * deaths / population).replace([np.inf], 0)
+        return _nelson_aalen_additive_discrete(population, deaths)
 
-    def smoothed_hazard_(self, bandwidth):
+    def smoothed_hazard_(self, bandwidth, timeline=None):
         """
         Parameters:
           bandwidth: the bandwith used in the Epanechnikov kernel.
+          timeline: the times to evaluate the smoothed hazard at, ex: a coarse grid. Default the fitted timeline.
 
         Returns:
           a DataFrame of the smoothed hazard
         """
-        timeline = self.timeline
+        timeline = self.timeline if timeline is None else np.asarray(timeline, dtype=float)
         cumulative_hazard_name = self.cumulative_hazard_.columns[0]
         hazard_name = "smoothed-" + cumulative_hazard_name
         hazard_ = self.cumulative_hazard_.diff().fillna(self.cumulative_hazard_.iloc[0])
         C = (hazard_[cumulative_hazard_name] != 0.0).values
-        return pd.DataFrame( 1./(2*bandwidth)*np.dot(epanechnikov_kernel(timeline[:, None], timeline[C][None, :], bandwidth), hazard_.values[C,:]),
-                             columns=[hazard_name], index=timeline)
+        jump_times = hazard_.index.values.astype(float)[C]
+        return pd.DataFrame(1. / (2 * bandwidth) * banded_kernel_smoothing(timeline, jump_times, hazard_.values[C, 0], bandwidth),
+                            columns=[hazard_name], index=timeline)
 
-    def smoothed_hazard_confidence_intervals_(self, bandwidth, hazard_=None):
+    def smoothed_hazard_confidence_intervals_(self, bandwidth, hazard_=None, timeline=None):
         """
         Parameter:
           bandwidth: the bandwith to use in the Epanechnikov kernel.
           hazard_: a computed (n,) numpy array of estimated hazard rates. If none, uses naf.smoothed_hazard_
+          timeline: the times to evaluate the intervals at. Default the fitted timeline.
         """
+        timeline = self.timeline if timeline is None else np.asarray(timeline, dtype=float)
         if hazard_ is None:
-            hazard_ = self.smoothed_hazard_(bandwidth).values[:, 0]
+            hazard_ = self.smoothed_hazard_(bandwidth, timeline).values[:, 0]
 
-        timeline = self.timeline
         alpha2 = inv_normal_cdf(1 - (1 - self.alpha) / 2)
-        self._cumulative_sq.iloc[0] = 0
-        var_hazard_ = self._cumulative_sq.diff().fillna(self._cumulative_sq.iloc[0])
+        ci_labels = self.confidence_interval_.columns
+        cumulative_sq_ = self._cumulative_sq.copy()
+        cumulative_sq_.iloc[0] = 0
+        var_hazard_ = cumulative_sq_.diff().fillna(cumulative_sq_.iloc[0])
         C = (var_hazard_.values != 0.0)  # only consider the points with jumps
-        std_hazard_ = np.sqrt(1./(2*bandwidth**2)*np.dot(epanechnikov_kernel(timeline[:, None], timeline[C][None, :], bandwidth)**2, var_hazard_.values[C]))
+        jump_times = var_hazard_.index.values.astype(float)[C]
+
+        def squared_kernel(t, T, bandwidth):
+            return epanechnikov_kernel(t, T, bandwidth) ** 2
+
+        smoothed_var_hazard_ = banded_kernel_smoothing(timeline, jump_times, var_hazard_.values[C], bandwidth,
+                                                       kernel=squared_kernel)
+        std_hazard_ = np.sqrt(1. / (2 * bandwidth ** 2) * smoothed_var_hazard_)
         values = {
-            self.ci_labels[0]: hazard_ * np.exp(alpha2 * std_hazard_ / hazard_),
-            self.ci_labels[1]: hazard_ * np.exp(-alpha2 * std_hazard_ / hazard_)
+            ci_labels[0]: hazard_ * np.exp(alpha2 * std_hazard_ / hazard_),
+            ci_labels[1]: hazard_ * np.exp(-alpha2 * std_hazard_ / hazard_)
         }
         return pd.DataFrame(values, index=timeline)
 
@@ -180,7 +299,7 @@ class KaplanMeierFitter(BaseFitter):
         self.alpha = alpha
 
     def fit(self, durations, event_observed=None, timeline=None, entry=None, label='KM-estimate',
-            alpha=None, left_censorship=False, ci_labels=None):
+            alpha=None, left_censorship=False, ci_labels=None, timeline_resolution=None):
         """
         Parameters:
           duration: an array, or pd.Series, of length n -- duration subject was observed for
@@ -192,28 +311,140 @@ class KaplanMeierFitter(BaseFitter):
              If None, defaults to all 0 (all birth events observed.)
           label: a string to name the column of the estimate.
           alpha: the alpha value in the confidence intervals. Overrides the initializing
-             alpha for this call to fit only.
+             alpha, and is used by later calls to confidence_interval_ too.
           left_censorship: True if durations and event_observed refer to left censorship events. Default False
           ci_labels: add custom column names to the generated confidence intervals
                 as a length-2 list: [<lower-bound name>, <upper-bound name>]. Default: <label>_lower_<alpha>
+          timeline_resolution: if not None, the timeline is the multiples of timeline_resolution spanning the
+             event times, rather than every event time. The estimates are still exact at these times, but they, and
+             everything computed from them, have one row per bucket rather than per event time.
+
+
+        Returns:
+          self, with new properties like 'survival_function_'.
+
+        """
+        v = preprocess_inputs(durations, event_observed, timeline, entry, timeline_resolution)
+        self.durations, self.event_observed, self.timeline, self.entry, self.event_table = v
+        self._timeline_resolution = timeline_resolution
+        return self._fit(label, alpha, left_censorship, ci_labels, entry is not None)
+
+    def fit_from_event_table(self, event_table, timeline=None, label='KM-estimate', alpha=None,
+                             left_censorship=False, ci_labels=None, observed_col='observed',
+                             censored_col='censored', entrance_col='entrance'):
+        """
+        Fit from pre-aggregated counts, rather than from one row per individual.
 
+        Parameters:
+          event_table: a DataFrame indexed by time, with the number of observed deaths and of
+             censorships at each time, and optionally the number of individuals entering the study
+             at each time. If there is no entrance column, everyone enters at time 0.
+             Also accepts a (merged) lifelines.utils.EventTable.
+          timeline: return the best estimate at the values in timelines (postively increasing)
+          label: a string to name the column of the estimate.
+          alpha: the alpha value in the confidence intervals. Overrides the initializing
+             alpha, and is used by later calls to confidence_interval_ too.
+          left_censorship: True if the counts refer to left censorship events. Default False
+          ci_labels: add custom column names to the generated confidence intervals
+                as a length-2 list: [<lower-bound name>, <upper-bound name>]. Default: <label>_lower_<alpha>
+          observed_col: the column of event_table with the number of observed deaths.
+          censored_col: the column of event_table with the number of censorships.
+          entrance_col: the column of event_table with the number of entrances, if any.
 
         Returns:
           self, with new properties like 'survival_function_'.
 
         """
+        v = preprocess_event_table(event_table, timeline, observed_col, censored_col, entrance_col)
+        self.durations, self.event_observed, self.timeline, self.entry, self.event_table = v
+        self._timeline_resolution = None
+        # only late entries can leave the early risk sets empty.
+        left_truncated = bool(self.event_table['entrance'].iloc[1:].any())
+        return self._fit(label, alpha, left_censorship, ci_labels, left_truncated)
+
+    def update(self, durations, event_observed=None, entry=None):
+        """
+        Add new observations to the fitted estimate, without reprocessing the ones it was fitted with:
+        they are merged into the event_table, and the estimates are only recomputed from the earliest
+        time the new observations affect onward, that is their earliest entry (0 if entry is None).
+        Like fit_from_event_table, the fit then only keeps the event_table: durations, event_observed
+        and entry are None.
+        Left censorship estimates are recomputed in full.
+
+        Parameters:
+          duration: an array, or pd.Series, of length n -- duration subject was observed for
+          event_observed: an array, or pd.Series, of length n -- True if the the death was observed, False if the event
+             was lost (right-censored). Defaults all True if event_observed==None
+          entry: an array, or pd.Series, of length n -- relative time when a subject entered the study.
+             If None, defaults to all 0 (all birth events observed.)
+
+        Returns:
+          self, with updated properties like 'survival_function_'.
+
+        """
+        v = preprocess_update(self, durations, event_observed, entry)
+        self.durations, self.event_observed, self.timeline, self.entry, self.event_table, start = v
+        increments = None
+        if not self._left_censorship:
+            increments = _additive_increments(self.event_table, self._additive_f, self._additive_var,
+                                              start, self._increments)
+        return self._fit(self._label, None, self._left_censorship, self._ci_labels,
+                         self._left_truncated or entry is not None, increments)
+
+    def fit_groups(self, durations, event_observed=None, groups=None, entry=None,
+                   label='KM-estimate', alpha=None, ci_labels=None, wide=False):
+        """
+        Fit one estimate per group in a single pass: the individuals are sorted once by (group, time),
+        and the estimates and their variances are segmented cumulative sums over the groups.
+
+        Parameters:
+          duration: an array, or pd.Series, of length n -- duration subject was observed for
+          event_observed: an array, or pd.Series, of length n -- True if the the death was observed, False if the event
+             was lost (right-censored). Defaults all True if event_observed==None
+          groups: (required) an array, or pd.Series, of length n -- the group of each subject.
+          entry: an array, or pd.Series, of length n -- relative time when a subject entered the study.
+             If None, defaults to all 0 (all birth events observed.)
+          label: a string to name the column of the estimate.
+          alpha: the alpha value in the confidence intervals. Default the initializing alpha.
+          ci_labels: add custom column names to the generated confidence intervals
+                as a length-2 list: [<lower-bound name>, <upper-bound name>]. Default: <label>_lower_<alpha>
+          wide: if True, return only the estimates, as a DataFrame with one column per group, indexed
+                by the times of all groups.
+
+        Returns:
+          a DataFrame indexed by (group, timeline), with the times of each group's event table, and
+          the estimate and confidence interval columns. See wide for the other format.
+
+        """
+        alpha = alpha if alpha else self.alpha
+        index, log_survival_function, cumulative_sq_ = _grouped_additive_estimate(
+            durations, event_observed, groups, entry, self._additive_f, self._additive_var)
+        if ci_labels is None:
+            ci_labels = ["%s_upper_%.2f" % (label, alpha), "%s_lower_%.2f" % (label, alpha)]
+        assert len(ci_labels) == 2, "ci_labels should be a length 2 array."
+
+        # See KaplanMeierFitter._bounds
+        alpha2 = inv_normal_cdf((1. + alpha) / 2.)
+        v = log_survival_function
+        upper = np.exp(-np.exp(np.log(-v) + alpha2 * np.sqrt(cumulative_sq_) / v))
+        lower = np.exp(-np.exp(np.log(-v) - alpha2 * np.sqrt(cumulative_sq_) / v))
+        return _grouped_result(index, [np.exp(v), upper, lower], [label] + list(ci_labels), wide)
+
+    def _fit(self, label, alpha, left_censorship, ci_labels, left_truncated, increments=None):
         # if the user is interested in left-censorship, we return the cumulative_density_, no survival_function_,
         estimate_name = 'survival_function_' if not left_censorship else 'cumulative_density_'
+        if increments is None and not left_censorship:
+            increments = _additive_increments(self.event_table, self._additive_f, self._additive_var)
 
-        v = preprocess_inputs(durations, event_observed, timeline, entry)
-        self.durations, self.event_observed, self.timeline, self.entry, self.event_table = v
         self._label = label
         self.alpha = alpha if alpha else self.alpha
+        self._left_censorship, self._ci_labels, self._left_truncated = left_censorship, ci_labels, left_truncated
+        self._increments = increments
         log_survival_function, cumulative_sq_ = _additive_estimate(self.event_table, self.timeline,
                                                                    self._additive_f, self._additive_var,
-                                                                   left_censorship)
+                                                                   left_censorship, increments)
 
-        if entry is not None:
+        if left_truncated:
             # a serious problem with KM is that when the sample size is small and there are too few early
             # truncation times, it may happen that is the number of patients at risk and the number of deaths is the same.
             # we adjust for this using the Breslow-Fleming-Harrington estimator
@@ -226,11 +457,11 @@ class KaplanMeierFitter(BaseFitter):
         # estimation
         setattr(self, estimate_name, pd.DataFrame(np.exp(log_survival_function), columns=[self._label]))
         self.__estimate = getattr(self, estimate_name)
-        self.confidence_interval_ = self._bounds(cumulative_sq_[:, None], ci_labels)
-        self.median_ = median_survival_times(self.__estimate)
+        self._cumulative_sq = cumulative_sq_
+        self._lazy_cache = {}
 
         # estimation methods
-        self.predict = _predict(self, estimate_name, label)
+        self.predict = _predict(self, estimate_name, self._label)
         self.subtract = _subtract(self, estimate_name)
         self.divide = _divide(self, estimate_name)
 
@@ -239,6 +470,18 @@ class KaplanMeierFitter(BaseFitter):
         setattr(self, "plot_" + estimate_name, self.plot)
         return self
 
+    @property
+    def confidence_interval_(self):
+        """
+        The confidence intervals of the estimate, computed on first access and recomputed if alpha changes.
+        """
+        return self._lazy('confidence_interval_', (self.alpha, self._ci_labels),
+                          lambda: self._bounds(self._cumulative_sq.values[:, None], self._ci_labels))
+
+    @property
+    def median_(self):
+        return self._lazy('median_', None, lambda: median_survival_times(self.__estimate))
+
     def _bounds(self, cumulative_sq_, ci_labels):
         # See http://courses.nus.edu.sg/course/stacar/internet/st3242/handouts/notes2.pdfg
         alpha2 = inv_normal_cdf((1. + self.alpha) / 2.)
@@ -266,17 +509,47 @@ class KaplanMeierFitter(BaseFitter):
         Return a DataFrame, with index equal to survival_function_, that estimates the median
         duration remaining until the death event, given survival up until time t. For example, if an
         indivual exists until age 1, their expected life remaining *given they lived to time 1*
-        might be 9 years.
+        might be 9 years. It is the first time the survival function is <= half its value at t, minus t:
+        np.inf if it never is, and NaN where the survival function is 0.
 
         Returns:
             conditional_time_to_: DataFrame, with index equal to survival_function_
 
         """
-        age = self.survival_function_.index.values[:, None]
+        age = self.survival_function_.index.values.astype(float)
+        survival = self.survival_function_[self._label].values
+
+        # the running minimum is sorted, so all the first crossings can be found at once.
+        running_min = np.minimum.accumulate(survival)
+        ix = np.searchsorted(-running_min, -0.5 * survival, side='left')
+        crossed = np.r_[age, np.inf][ix]
+
         columns = ['%s - Conditional time remaining to event' % self._label]
-        return pd.DataFrame(qth_survival_times(self.survival_function_[self._label] * 0.5, self.survival_function_).T.sort(ascending=False).values,
-                            index=self.survival_function_.index,
-                            columns=columns) - age
+        return pd.DataFrame(np.where(survival > 0, crossed - age, np.nan),
+                            index=self.survival_function_.index, columns=columns)
+
+    def conditional_mean_time_to(self):
+        """
+        Return a DataFrame, with index equal to survival_function_, that estimates the mean
+        duration remaining until the death event, given survival up until time t: the area under the
+        survival function after t, divided by its value at t. The area is restricted to the timeline,
+        ie. it stops at the last time of survival_function_. NaN where the survival function is 0.
+
+        Returns:
+            conditional_mean_time_to_: DataFrame, with index equal to survival_function_
+
+        """
+        age = self.survival_function_.index.values.astype(float)
+        survival = self.survival_function_[self._label].values
+
+        # the area of the step function between each time and the next, summed from the end.
+        areas = survival[:-1] * np.diff(age)
+        remaining_area = np.r_[np.cumsum(areas[::-1])[::-1], 0.]
+
+        columns = ['%s - Conditional mean time remaining to event' % self._label]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v = np.where(survival > 0, remaining_area / survival, np.nan)
+        return pd.DataFrame(v, index=self.survival_function_.index, columns=columns)
 
 
 class BreslowFlemingHarringtonFitter(BaseFitter):
@@ -289,17 +562,20 @@ class BreslowFlemingHarringtonFitter(BaseFitter):
 
     Mathematically, the NAF estimator is the negative logarithm of the BFH estimator.
 
-    BreslowFlemingHarringtonFitter(alpha=0.95)
+    BreslowFlemingHarringtonFitter(alpha=0.95, nelson_aalen_smoothing=True)
 
     alpha: The alpha value associated with the confidence intervals.
+    nelson_aalen_smoothing: how the Nelson-Aalen estimate counts tied deaths, see NelsonAalenFitter.
 
     """
 
-    def __init__(self, alpha=0.95):
+    def __init__(self, alpha=0.95, nelson_aalen_smoothing=True):
         self.alpha = alpha
+        self.nelson_aalen_smoothing = nelson_aalen_smoothing
+        self._additive_f, self._variance_f = _nelson_aalen_increments(nelson_aalen_smoothing)
 
     def fit(self, durations, event_observed=None, timeline=None, entry=None,
-            label='BFH-estimate', alpha=None, ci_labels=None):
+            label='BFH-estimate', alpha=None, ci_labels=None, timeline_resolution=None):
         """
         Parameters:
           duration: an array, or pd.Series, of length n -- duration subject was observed for
@@ -311,24 +587,110 @@ class BreslowFlemingHarringtonFitter(BaseFitter):
              If None, defaults to all 0 (all birth events observed.)
           label: a string to name the column of the estimate.
           alpha: the alpha value in the confidence intervals. Overrides the initializing
-             alpha for this call to fit only.
+             alpha, and is used by later calls to confidence_interval_ too.
           ci_labels: add custom column names to the generated confidence intervals
                 as a length-2 list: [<lower-bound name>, <upper-bound name>]. Default: <label>_lower_<alpha>
+          timeline_resolution: if not None, the timeline is the multiples of timeline_resolution spanning the
+             event times, rather than every event time. The estimates are still exact at these times, but they, and
+             everything computed from them, have one row per bucket rather than per event time.
 
 
         Returns:
           self, with new properties like 'survival_function_'.
 
         """
-        naf = NelsonAalenFitter(self.alpha)
-        naf.fit(durations, event_observed=event_observed, timeline=timeline, label=label, entry=entry, ci_labels=ci_labels)
-        self.durations, self.event_observed, self.timeline, self.entry, self.event_table = \
-            naf.durations, naf.event_observed, naf.timeline, naf.entry, naf.event_table
+        v = preprocess_inputs(durations, event_observed, timeline, entry, timeline_resolution)
+        self.durations, self.event_observed, self.timeline, self.entry, self.event_table = v
+        return self._fit(label, alpha, ci_labels)
+
+    def fit_from_event_table(self, event_table, timeline=None, label='BFH-estimate', alpha=None, ci_labels=None,
+                             observed_col='observed', censored_col='censored', entrance_col='entrance'):
+        """
+        Fit from pre-aggregated counts, rather than from one row per individual.
+
+        Parameters:
+          event_table: a DataFrame indexed by time, with the number of observed deaths and of
+             censorships at each time, and optionally the number of individuals entering the study
+             at each time. If there is no entrance column, everyone enters at time 0.
+             Also accepts a (merged) lifelines.utils.EventTable.
+          timeline: return the best estimate at the values in timelines (postively increasing)
+          label: a string to name the column of the estimate.
+          alpha: the alpha value in the confidence intervals. Overrides the initializing
+             alpha, and is used by later calls to confidence_interval_ too.
+          ci_labels: add custom column names to the generated confidence intervals
+                as a length-2 list: [<lower-bound name>, <upper-bound name>]. Default: <label>_lower_<alpha>
+          observed_col: the column of event_table with the number of observed deaths.
+          censored_col: the column of event_table with the number of censorships.
+          entrance_col: the column of event_table with the number of entrances, if any.
+
+        Returns:
+          self, with new properties like 'survival_function_'.
+
+        """
+        v = preprocess_event_table(event_table, timeline, observed_col, censored_col, entrance_col)
+        self.durations, self.event_observed, self.timeline, self.entry, self.event_table = v
+        return self._fit(label, alpha, ci_labels)
+
+    def fit_groups(self, durations, event_observed=None, groups=None, entry=None,
+                   label='BFH-estimate', alpha=None, ci_labels=None, wide=False):
+        """
+        Fit one estimate per group in a single pass: the individuals are sorted once by (group, time),
+        and the estimates and their variances are segmented cumulative sums over the groups.
+
+        Parameters:
+          duration: an array, or pd.Series, of length n -- duration subject was observed for
+          event_observed: an array, or pd.Series, of length n -- True if the the death was observed, False if the event
+             was lost (right-censored). Defaults all True if event_observed==None
+          groups: (required) an array, or pd.Series, of length n -- the group of each subject.
+          entry: an array, or pd.Series, of length n -- relative time when a subject entered the study.
+             If None, defaults to all 0 (all birth events observed.)
+          label: a string to name the column of the estimate.
+          alpha: the alpha value in the confidence intervals. Default the initializing alpha.
+          ci_labels: add custom column names to the generated confidence intervals
+                as a length-2 list: [<lower-bound name>, <upper-bound name>]. Default: <label>_lower_<alpha>
+          wide: if True, return only the estimates, as a DataFrame with one column per group, indexed
+                by the times of all groups.
+
+        Returns:
+          a DataFrame indexed by (group, timeline), with the times of each group's event table, and
+          the estimate and confidence interval columns. See wide for the other format.
+
+        """
+        alpha = alpha if alpha else self.alpha
+        index, cumulative_hazard_, cumulative_sq_ = _grouped_additive_estimate(
+            durations, event_observed, groups, entry, self._additive_f, self._variance_f)
+        if ci_labels is None:
+            ci_labels = ["%s_upper_%.2f" % (label, alpha), "%s_lower_%.2f" % (label, alpha)]
+        assert len(ci_labels) == 2, "ci_labels should be a length 2 array."
+
+        # the bounds of the cumulative hazard, like the BFH estimate itself.
+        upper, lower = _nelson_aalen_bounds(cumulative_hazard_, cumulative_sq_, alpha)
+        return _grouped_result(index, [np.exp(-cumulative_hazard_), np.exp(-upper), np.exp(-lower)],
+                               [label] + list(ci_labels), wide)
+
+    @property
+    def confidence_interval_(self):
+        """
+        The confidence intervals of survival_function_, computed on first access and recomputed if alpha changes.
+        """
+        alpha = self.alpha
+        return self._lazy('confidence_interval_', (alpha, self._ci_labels), lambda: self._bounds(alpha, self._ci_labels))
+
+    @property
+    def median_(self):
+        return self._lazy('median_', None, lambda: median_survival_times(self.survival_function_))
+
+    def _fit(self, label, alpha, ci_labels):
+        cumulative_hazard_, cumulative_sq_ = _additive_estimate(self.event_table, self.timeline,
+                                                                self._additive_f, self._variance_f, False)
 
         # estimation
-        self.survival_function_ = np.exp(-naf.cumulative_hazard_)
-        self.confidence_interval_ = np.exp(-naf.confidence_interval_)
-        self.median_ = median_survival_times(self.survival_function_)
+        self._label = label
+        self.alpha = alpha if alpha else self.alpha
+        self._ci_labels = ci_labels
+        self.survival_function_ = pd.DataFrame(np.exp(-cumulative_hazard_), columns=[self._label])
+        self._cumulative_hazard, self._cumulative_sq = cumulative_hazard_, cumulative_sq_
+        self._lazy_cache = {}
 
         # estimation methods
         self.predict = _predict(self, "survival_function_", label)
@@ -340,6 +702,18 @@ class BreslowFlemingHarringtonFitter(BaseFitter):
         self.plot_survival_function = self.plot
         return self
 
+    def _bounds(self, alpha, ci_labels):
+        df = pd.DataFrame(index=self.timeline)
+
+        if ci_labels is None:
+            ci_labels = ["%s_upper_%.2f" % (self._label, alpha), "%s_lower_%.2f" % (self._label, alpha)]
+        assert len(ci_labels) == 2, "ci_labels should be a length 2 array."
+
+        # the bounds of the cumulative hazard, like the BFH estimate itself.
+        upper, lower = _nelson_aalen_bounds(self._cumulative_hazard.values, self._cumulative_sq.values, alpha)
+        df[ci_labels[0]], df[ci_labels[1]] = np.exp(-upper), np.exp(-lower)
+        return df
+
 
 class BayesianFitter(BaseFitter):
 
@@ -356,13 +730,17 @@ class BayesianFitter(BaseFitter):
     Parameters:
         samples: the number of sample survival functions to return.
 
+    Many samples of long timelines can be summarized without holding them all in memory, see
+    sample_credible_bands and the chunksize parameter of fit.
+
     """
 
     def __init__(self, samples=300):
         self.beta = beta
         self.samples = samples
 
-    def fit(self, durations, censorship=None, timeline=None, entry=None):
+    def fit(self, durations, censorship=None, timeline=None, entry=None, chunksize=None,
+            alpha=0.95, n_jobs=1, random_state=None, timeline_resolution=None):
         """
         Parameters:
           duration: an array, or pd.Series, of length n -- duration subject was observed for
@@ -372,31 +750,197 @@ class BayesianFitter(BaseFitter):
           entry: an array, or pd.Series, of length n -- relative time when a subject entered the study. This is
              useful for left-truncated observations, i.e the birth event was not observed.
              If None, defaults to all 0 (all birth events observed.)
+          chunksize: if not None, generate the samples in chunks of this size and only keep their
+             credible bands, in 'credible_bands_', rather than the samples. See sample_credible_bands.
+          alpha, n_jobs, random_state: passed to sample_credible_bands if chunksize is not None.
+          timeline_resolution: if not None, the timeline is the multiples of timeline_resolution spanning the
+             event times, rather than every event time. The estimates are still exact at these times, but they, and
+             everything computed from them, have one row per bucket rather than per event time.
 
         Returns:
           self, with new properties like 'sample_survival_functions_'.
         """
-        v = preprocess_inputs(durations, censorship, timeline, entry)
+        v = preprocess_inputs(durations, censorship, timeline, entry, timeline_resolution)
         self.durations, self.censorship, self.timeline, self.entry, self.event_table = v
 
-        self.sample_survival_functions_ = self.generate_sample_path(self.samples)
+        # only one of the samples and their credible bands describes this fit.
+        self.__dict__.pop('sample_survival_functions_', None)
+        self.__dict__.pop('credible_bands_', None)
+        if chunksize is None:
+            self.sample_survival_functions_ = self.generate_sample_path(self.samples)
+        else:
+            self.credible_bands_ = self.sample_credible_bands(self.samples, chunksize, alpha, n_jobs, random_state)
 
         return self
 
     def plot(self, **kwargs):
+        """
+        Plots the sample survival functions, or, if fit was called with chunksize, the mean and the
+        credible bands of the samples.
+        """
+        color = coalesce(kwargs.pop('c', None), kwargs.pop('color', None), '#348ABD')
+        if not hasattr(self, 'sample_survival_functions_'):
+            from matplotlib import pyplot as plt
+
+            ax = kwargs.pop('ax', None) or plt.figure().add_subplot(111)
+            bands = self.credible_bands_
+            shaded_plot(bands.index.values, bands['mean'].values, bands.iloc[:, 2].values, bands.iloc[:, 1].values,
+                        ax=ax, color=color, **kwargs)
+            return ax
+
         kwargs['alpha'] = coalesce(kwargs.pop('alpha', None), 0.05)
         kwargs['legend'] = False
-        kwargs['c'] = coalesce(kwargs.pop('c', None), kwargs.pop('color', None), '#348ABD')
+        kwargs['c'] = color
         ax = self.sample_survival_functions_.plot(**kwargs)
         return ax
 
     def generate_sample_path(self, n=1):
-        deaths = self.event_table['observed']
-        population = self.event_table['entrance'].cumsum() - self.event_table['removed'].cumsum().shift(1).fillna(0)
-        d = deaths.shape[0]
-        samples = 1. - beta(0.01 + deaths, 0.01 + population - deaths, size=(n, d))
-        sample_paths = pd.DataFrame(np.exp(np.log(samples).cumsum(1)).T, index=self.timeline)
-        return sample_paths
+        a, b, ix = self._beta_parameters()
+        return pd.DataFrame(_bayesian_sample_paths(a, b, ix, n, beta).T, index=self.timeline)
+
+    def sample_credible_bands(self, n, chunksize=1000, alpha=0.95, n_jobs=1, random_state=None):
+        """
+        Generates n sample survival functions in chunks of chunksize samples, and only keeps their
+        running sum and, at every time, the few smallest and largest values needed for the exact
+        (1 - alpha) / 2 and (1 + alpha) / 2 quantiles. Memory is O(timeline * (chunksize + n * (1 - alpha))),
+        rather than O(timeline * n).
+
+        Parameters:
+          n: the number of sample survival functions.
+          chunksize: the number of samples generated at once.
+          alpha: the credible level of the bands.
+          n_jobs: the number of processes generating the chunks. -1 uses all cores.
+          random_state: a seed for the random stream of every chunk. The chunks use independent
+             streams, so the bands only depend on the seed, not on n_jobs.
+
+        Returns:
+          a DataFrame, with index equal to the timeline, of the mean of the samples and the quantiles
+          of the credible band (as np.percentile).
+        """
+        a, b, ix = self._beta_parameters()
+        sizes = [min(chunksize, n - start) for start in range(0, n, chunksize)]
+        seeds = np.random.RandomState(random_state).randint(0, 2 ** 31 - 1, size=len(sizes))
+
+        # the positions of the quantiles in the sorted samples, and how many samples to keep for them.
+        lower_position, upper_position = (1 - alpha) / 2. * (n - 1), (1 + alpha) / 2. * (n - 1)
+        n_lower, n_upper = min(n, int(lower_position) + 2), n - int(upper_position)
+        chunks = [(a, b, ix, size, seed, n_lower, n_upper) for size, seed in zip(sizes, seeds)]
+
+        if n_jobs == -1:
+            n_jobs = cpu_count()
+        if n_jobs == 1 or len(chunks) == 1:
+            summaries = map(_bayesian_chunk_summary, chunks)
+            summary = reduce(lambda s1, s2: _merge_bayesian_summaries(s1, s2, n_lower, n_upper), summaries)
+        else:
+            pool = Pool(min(n_jobs, len(chunks)))
+            try:
+                summaries = pool.imap(_bayesian_chunk_summary, chunks)
+                summary = reduce(lambda s1, s2: _merge_bayesian_summaries(s1, s2, n_lower, n_upper), summaries)
+            finally:
+                pool.close()
+                pool.join()
+
+        total, smallest, largest = summary
+        smallest.sort(axis=0)
+        largest.sort(axis=0)
+        # largest holds the sorted samples from int(upper_position) on.
+        lower = _interpolate_order_statistics(smallest, lower_position, 0, n)
+        upper = _interpolate_order_statistics(largest, upper_position, int(upper_position), n)
+        return pd.DataFrame({'mean': total / n, 'lower_%.2f' % alpha: lower, 'upper_%.2f' % alpha: upper},
+                            index=self.timeline, columns=['mean', 'lower_%.2f' % alpha, 'upper_%.2f' % alpha])
+
+    def _beta_parameters(self):
+        deaths = self.event_table['observed'].values
+        population = (self.event_table['entrance'].cumsum() - self.event_table['removed'].cumsum().shift(1).fillna(0)).values
+        # the event table row of every time of the timeline, -1 before the first.
+        ix = np.searchsorted(self.event_table.index.values.astype(float), self.timeline, side='right') - 1
+        return 0.01 + deaths, 0.01 + population - deaths, ix
+
+
+class TurnbullFitter(BaseFitter):
+
+    """
+    Class for fitting Turnbull's nonparametric maximum likelihood estimate of the survival function
+    from interval-censored data: the event of every subject is only known to be in (lower_bound, upper_bound].
+    Subjects with lower_bound == upper_bound were observed exactly, right-censored subjects have
+    upper_bound = np.inf, and left-censored subjects lower_bound = 0.
+
+    The likelihood only depends on the probabilities of the Turnbull intervals, the innermost intervals
+    between the bounds. The estimate puts their probability at their upper ends, and is undetermined inside them.
+
+    TurnbullFitter(epsilon=1e-8, max_steps=1000)
+
+    epsilon: the EM iterations stop when no probability changes by more than epsilon.
+    max_steps: the maximum number of (accelerated) EM iterations. Inspection data, where the bounds take few
+      distinct values, converge in a few steps. Continuous, overlapping intervals can have about as many
+      Turnbull intervals as subjects, and converge much more slowly.
+
+    """
+
+    def __init__(self, epsilon=1e-8, max_steps=1000):
+        self.epsilon = epsilon
+        self.max_steps = max_steps
+
+    def fit(self, lower_bound, upper_bound, timeline=None, label='Turnbull-estimate'):
+        """
+        Parameters:
+          lower_bound: an array, or pd.Series, of length n -- the last time the subject was known to be alive.
+          upper_bound: an array, or pd.Series, of length n -- the first time the subject was known to have died,
+             np.inf if the subject was right-censored.
+          timeline: return the best estimate at the values in timelines (postively increasing)
+          label: a string to name the column of the estimate.
+
+        Returns:
+          self, with new properties like 'survival_function_' and 'turnbull_intervals_'. 'converged_' is
+          False if the EM iterations ran out of steps before converging.
+
+        """
+        n = len(lower_bound)
+        lower_bound = np.asarray(lower_bound, dtype=float).reshape((n,))
+        upper_bound = np.asarray(upper_bound, dtype=float).reshape((n,))
+        assert (lower_bound <= upper_bound).all(), "lower_bound must be less than or equal to upper_bound."
+        self.lower_bound, self.upper_bound = lower_bound, upper_bound
+
+        lower, upper, start, end = _turnbull_intervals(lower_bound, upper_bound)
+        m = lower.shape[0]
+
+        # subjects containing the same Turnbull intervals have the same likelihood, so EM only iterates
+        # over the distinct ranges of intervals, weighted by their number of subjects.
+        ranges, weights = np.unique(start * (m + 1) + end, return_counts=True)
+        start, end = ranges // (m + 1), ranges % (m + 1)
+        p, self.log_likelihood_, self.steps_, self.converged_ = _turnbull_squarem(
+            np.ones(m) / m, start, end, weights.astype(float), self.epsilon, self.max_steps)
+        if not self.converged_:
+            print("Warning: the EM iterations did not converge in %d steps. Try increasing max_steps." % self.max_steps)
+        self.turnbull_intervals_ = pd.DataFrame({'lower': lower, 'upper': upper, 'probability': p},
+                                                columns=['lower', 'upper', 'probability'])
+
+        if timeline is None:
+            timeline = np.unique(np.concatenate(([0.], lower, upper[np.isfinite(upper)])))
+        self.timeline = np.asarray(timeline, dtype=float)
+
+        # S(t) = 1 - the probability of the Turnbull intervals ending by t.
+        cumulative_p = np.concatenate(([0.], np.cumsum(p)))
+        survival = 1 - cumulative_p[np.searchsorted(upper, self.timeline, side='right')]
+
+        self._label = label
+        self.survival_function_ = pd.DataFrame(np.maximum(survival, 0), index=pd.Index(self.timeline, name='timeline'),
+                                               columns=[label])
+        self._lazy_cache = {}
+
+        # estimation methods
+        self.predict = _predict(self, "survival_function_", label)
+        self.subtract = _subtract(self, "survival_function_")
+        self.divide = _divide(self, "survival_function_")
+        return self
+
+    @property
+    def median_(self):
+        return self._lazy('median_', None, lambda: median_survival_times(self.survival_function_))
+
+    def plot(self, **kwargs):
+        kwargs['drawstyle'] = coalesce(kwargs.pop('drawstyle', None), 'steps-post')
+        return self.survival_function_.plot(**kwargs)
 
 
 class AalenAdditiveFitter(BaseFitter):
@@ -424,7 +968,7 @@ class AalenAdditiveFitter(BaseFitter):
         assert penalizer >= 0, "penalizer must be >= 0."
 
     def fit(self, dataframe, duration_col="T", event_col="E",
-            timeline=None, id_col=None, show_progress=True):
+            timeline=None, id_col=None, show_progress=True, n_jobs=1, time_bins=None):
         """
         Perform inference on the coefficients of the Aalen additive model.
 
@@ -460,23 +1004,29 @@ class AalenAdditiveFitter(BaseFitter):
             timeline: reformat the estimates index to a new timeline.
             id_col: (only for time-varying covariates) name of the id column in the dataframe
             progress_bar: include a fancy progress bar =)
-            max_unique_durations: memory can be an issue if there are too many
-              unique durations. If the max is surpassed, max_unique_durations bins
-              will be used.
+            n_jobs: (only for static covariates) the number of processes to solve the regressions
+              with. The death times are split into n_jobs contiguous blocks, each solved from its
+              own starting risk set. -1 uses all cores. The progress bar is only shown with a single
+              process. Default 1.
+            time_bins: (only for static covariates) approximate the fit with one regression per bin of
+              death times, using the risk set at the bin's first death. Either an int, K, for K bins
+              of equal numbers of deaths, or an array of times to split the bins at. The estimates
+              are reported at the last death time of each bin. Default None, one regression per
+              death time.
 
         Returns:
           self, with new methods like plot, smoothed_hazards_ and properties like cumulative_hazards_
         """
 
         if id_col is None:
-            self._fit_static(dataframe, duration_col, event_col, timeline, show_progress)
+            self._fit_static(dataframe, duration_col, event_col, timeline, show_progress, n_jobs, time_bins)
         else:
             self._fit_varying(dataframe, duration_col, event_col, id_col, timeline, show_progress)
 
         return self
 
     def _fit_static(self, dataframe, duration_col="T", event_col="E",
-                    timeline=None, show_progress=True):
+                    timeline=None, show_progress=True, n_jobs=1, time_bins=None):
         """
         Perform inference on the coefficients of the Aalen additive model.
 
@@ -490,18 +1040,46 @@ class AalenAdditiveFitter(BaseFitter):
             event_col: specify what the event occurred column is called in the dataframe
             timeline: reformat the estimates index to a new timeline.
             progress_bar: include a fancy progress bar!
+            n_jobs: the number of processes to solve the regressions with (without a progress bar if > 1).
+            time_bins: an int or array of split times, to solve one regression per bin of deaths.
 
         Returns:
           self, with new methods like plot, smoothed_hazards_ and properties like cumulative_hazards_
         """
 
-        from_tuples = pd.MultiIndex.from_tuples
+        X, T, C, columns, death_rows, death_times, steps = self._static_regression_inputs(dataframe, duration_col,
+                                                                                          event_col, time_bins)
+
+        hazards, variance = _aalen_additive_regressions(X, T.values, death_rows, steps, np.array([self.penalizer]),
+                                                        n_jobs=n_jobs, show_progress=show_progress)
+        hazards, variance = hazards[0], variance[0]
+
+        # not sure this is the correct thing to do.
+        self.hazards_ = pd.DataFrame(hazards, columns=columns, index=death_times)
+        self.cumulative_hazards_ = self.hazards_.cumsum()
+        self.variance_ = pd.DataFrame(variance, columns=columns, index=death_times)
+
+        if timeline is not None:
+            self.hazards_ = self.hazards_.reindex(timeline, method='ffill')
+            self.cumulative_hazards_ = self.cumulative_hazards_.reindex(timeline, method='ffill')
+            self.variance_ = self.variance_.reindex(timeline, method='ffill')
+            self.timeline = timeline
+        else:
+            self.timeline = self.hazards_.index.values.astype(float)
+
+        self.data = dataframe
+        self.durations = T
+        self.event_observed = C
+        self._compute_confidence_intervals()
+        self.plot = plot_regressions(self)
+
+        return
+
+    def _static_regression_inputs(self, dataframe, duration_col, event_col, time_bins=None):
         df = dataframe.copy()
 
         # set unique ids for individuals
-        id_col = 'id'
         ids = np.arange(df.shape[0])
-        df[id_col] = ids
 
         # if the regression should fit an intercept
         if self.fit_intercept:
@@ -511,92 +1089,69 @@ class AalenAdditiveFitter(BaseFitter):
         C = pd.Series(df[event_col].values, dtype=bool, index=ids)
         T = pd.Series(df[duration_col].values, index=ids)
 
-        df = df.set_index(id_col)
-
-        ix = T.argsort()
+        ix = np.argsort(T.values, kind='mergesort')
         T, C = T.iloc[ix], C.iloc[ix]
 
         del df[event_col]
         del df[duration_col]
-        n, d = df.shape
-        columns = df.columns
-
-        # initialize dataframe to store estimates
-        non_censorsed_times = list(T[C].iteritems())
-        n_deaths = len(non_censorsed_times)
-
-        hazards_ = pd.DataFrame(np.zeros((n_deaths, d)), columns=columns,
-                                index=from_tuples(non_censorsed_times)).swaplevel(1, 0)
-
-        variance_ = pd.DataFrame(np.zeros((n_deaths, d)), columns=columns,
-                                 index=from_tuples(non_censorsed_times)).swaplevel(1, 0)
 
-        # initializes the penalizer matrix
-        penalizer = self.penalizer * np.eye(d)
-
-        # initialize loop variables.
-        progress = progress_bar(n_deaths)
-        to_remove = []
-        t = T.iloc[0]
-        i = 0
-
-        for id, time in T.iteritems():  # should be sorted.
-
-            if t != time:
-                assert t < time
-                # remove the individuals from the previous loop.
-                df.iloc[to_remove] = 0.
-                to_remove = []
-                t = time
-
-            to_remove.append(id)
-            if C[id] == 0:
-                continue
+        # covariates and death positions, both in order of leaving the study.
+        X = df.values[ix].astype(float)
+        death_rows = np.where(C.values)[0]
 
-            relevant_individuals = (ids == id)
-            assert relevant_individuals.sum() == 1.
-
-            # perform linear regression step.
-            X = df.values
-            try:
-                V = dot(inv(dot(X.T, X) + penalizer), X.T)
-            except LinAlgError:
-                print("Linear regression error. Try increasing the penalizer term.")
+        # tied deaths share a risk set, so they are solved together in one regression step.
+        death_times, steps = np.unique(T.values[death_rows], return_index=True)
+        steps = np.r_[steps, death_rows.shape[0]]
 
-            v = dot(V, 1.0 * relevant_individuals)
+        if time_bins is not None and death_rows.shape[0] > 0:
+            # coarsen: one regression step per (non-empty) bin of deaths, reported at its last death.
+            if np.ndim(time_bins) == 0:
+                splits = np.percentile(T.values[death_rows], np.linspace(0, 100, int(time_bins) + 1)[1:-1])
+            else:
+                splits = np.sort(np.asarray(time_bins, dtype=float))
+            _, steps = np.unique(np.searchsorted(splits, T.values[death_rows], side='left'), return_index=True)
+            steps = np.r_[steps, death_rows.shape[0]]
+            death_times = T.values[death_rows[steps[1:] - 1]]
 
-            hazards_.ix[time, id] = v.T
-            variance_.ix[time, id] = V[:, relevant_individuals][:, 0] ** 2
+        return X, T, C, df.columns, death_rows, death_times, steps
 
-            # update progress bar
-            if show_progress:
-                i += 1
-                progress.update(i)
+    def fit_path(self, dataframe, penalizers, duration_col="T", event_col="E",
+                 timeline=None, show_progress=True, n_jobs=1):
+        """
+        Fit the Aalen additive model with static covariates for several penalizers at once. Each
+        regression step decomposes the risk set's Gram matrix once and reuses it for every penalizer,
+        so the path costs about as much as a single fit. The fitter's own estimates are not changed.
 
-        # print a new line so the console displays well
-        if show_progress:
-            print()
+        Parameters:
+            dataframe: a pandas dataframe, with covariates and a duration_col and a event_col.
+                      one row per individual. See fit.
+            penalizers: an iterable of L2 penalizers, each >= 0.
+            duration_col: specify what the duration column is called in the dataframe
+            event_col: specify what the event occurred column is called in the dataframe
+            timeline: reformat the estimates index to a new timeline.
+            progress_bar: include a fancy progress bar!
+            n_jobs: the number of processes to solve the regressions with. The progress bar is only
+              shown with a single process. See fit.
 
-        # not sure this is the correct thing to do.
-        self.hazards_ = hazards_.groupby(level=0).sum()
-        self.cumulative_hazards_ = self.hazards_.cumsum()
-        self.variance_ = variance_.groupby(level=0).sum()
+        Returns:
+          a DataFrame of the cumulative_hazards_ of every penalizer, stacked on an index of
+          (penalizer, time), ex: .ix[0.5] are the cumulative hazards with a penalizer of 0.5.
+        """
+        penalizers = np.asarray(penalizers, dtype=float).ravel()
+        assert (penalizers >= 0).all(), "penalizers must be >= 0."
 
-        if timeline is not None:
-            self.hazards_ = self.hazards_.reindex(timeline, method='ffill')
-            self.cumulative_hazards_ = self.cumulative_hazards_.reindex(timeline, method='ffill')
-            self.variance_ = self.variance_.reindex(timeline, method='ffill')
-            self.timeline = timeline
-        else:
-            self.timeline = self.hazards_.index.values.astype(float)
+        X, T, C, columns, death_rows, death_times, steps = self._static_regression_inputs(dataframe, duration_col, event_col)
 
-        self.data = dataframe
-        self.durations = T
-        self.event_observed = C
-        self._compute_confidence_intervals()
-        self.plot = plot_regressions(self)
+        hazards, _ = _aalen_additive_regressions(X, T.values, death_rows, steps, penalizers,
+                                                 n_jobs=n_jobs, show_progress=show_progress)
 
-        return
+        cumulative_hazards = []
+        for hazards_ in hazards:
+            cumulative_hazards_ = pd.DataFrame(hazards_, columns=columns, index=death_times).cumsum()
+            if timeline is not None:
+                cumulative_hazards_ = cumulative_hazards_.reindex(timeline, method='ffill')
+            cumulative_hazards.append(cumulative_hazards_)
+        return pd.concat(cumulative_hazards, keys=penalizers, names=['penalizer', 'timeline'])
 
     def _fit_varying(self, dataframe, duration_col="T", event_col="E",
                      id_col=None, timeline=None, show_progress=True):
@@ -690,13 +1245,15 @@ class AalenAdditiveFitter(BaseFitter):
 
         return
 
-    def smoothed_hazards_(self, bandwidth=1):
+    def smoothed_hazards_(self, bandwidth=1, timeline=None):
         """
         Using the epanechnikov kernel to smooth the hazard function, with sigma/bandwidth
 
+        timeline: the times to evaluate the smoothed hazards at, ex: a coarse grid. Default the fitted timeline.
         """
-        return pd.DataFrame(np.dot(epanechnikov_kernel(self.timeline[:, None], self.timeline, bandwidth), self.hazards_.values),
-                            columns=self.hazards_.columns, index=self.timeline)
+        timeline = self.timeline if timeline is None else np.asarray(timeline, dtype=float)
+        return pd.DataFrame(banded_kernel_smoothing(timeline, self.hazards_.index.values, self.hazards_.values, bandwidth),
+                            columns=self.hazards_.columns, index=timeline)
 
     def _compute_confidence_intervals(self):
         alpha2 = inv_normal_cdf(1 - (1 - self.alpha) / 2)
@@ -716,17 +1273,21 @@ class AalenAdditiveFitter(BaseFitter):
             alpha2 * np.sqrt(self.variance_.cumsum().values)
         return
 
-    def predict_cumulative_hazard(self, X, id_col=None):
+    def predict_cumulative_hazard(self, X, id_col=None, duration_col="T"):
         """
         X: a (n,d) covariate numpy array or DataFrame. If a DataFrame, columns
             can be in any order. If a numpy array, columns must be in the
             same order as the training data.
+        id_col: (only for time-varying covariates) name of the id column in X. X is then
+            in the long format used to fit time-varying covariates: one row per individual and
+            covariate change, where the covariates in a row apply from the individual's previous
+            row up to duration_col. The last row's covariates are carried forward.
+        duration_col: (only for time-varying covariates) name of the duration column in X.
 
         Returns the hazard rates for the individuals
         """
         if id_col is not None:
-            # see https://github.com/CamDavidsonPilon/lifelines/issues/38
-            raise NotImplementedError
+            return self._predict_cumulative_hazard_varying(X, id_col, duration_col)
 
         n, d = X.shape
 
@@ -740,6 +1301,41 @@ class AalenAdditiveFitter(BaseFitter):
         X_ = X_ if not self.fit_intercept else np.c_[X_, np.ones((n, 1))]
         return pd.DataFrame(np.dot(self.cumulative_hazards_, X_.T), index=self.timeline, columns=cols)
 
+    def _predict_cumulative_hazard_varying(self, X, id_col, duration_col):
+        order = self.cumulative_hazards_.columns
+        order = order.drop('baseline') if self.fit_intercept else order
+
+        ids = X[id_col].values
+        durations = X[duration_col].values.astype(float)
+        ix = np.lexsort((durations, ids))
+        ids, durations = ids[ix], durations[ix]
+        X_ = X[order].values[ix].astype(float)
+
+        n = X_.shape[0]
+        X_ = X_ if not self.fit_intercept else np.c_[X_, np.ones((n, 1))]
+        times = self.cumulative_hazards_.index.values.astype(float)
+        n_times = times.shape[0]
+
+        # a row's covariates apply on (previous duration, duration]: as positions in
+        # the cumulative hazards padded with a leading zero row, on (lo, hi].
+        new_individual = np.r_[True, ids[1:] != ids[:-1]]
+        last_row = np.r_[new_individual[1:], True]
+        hi = np.searchsorted(times, durations, side='right')
+        hi[last_row] = n_times
+        lo = np.r_[0, hi[:-1]]
+        lo[new_individual] = 0
+
+        # x_r * B(t) for every row and time, then each row's integral up to every time.
+        XB = np.dot(X_, np.r_[np.zeros((1, X_.shape[1])), self.cumulative_hazards_.values].T)
+        rows = np.arange(n)[:, None]
+        positions = np.clip(np.arange(1, n_times + 1)[None, :], lo[:, None], hi[:, None])
+        integrals = XB[rows, positions] - XB[rows, lo[:, None]]
+
+        # sum the rows' integrals per individual.
+        starts = np.where(new_individual)[0]
+        cumulative_hazards = np.add.reduceat(integrals, starts, axis=0)
+        return pd.DataFrame(cumulative_hazards.T, index=self.timeline, columns=ids[starts])
+
     def predict_survival_function(self, X):
         """
         X: a (n,d) covariate numpy array or DataFrame. If a DataFrame, columns
@@ -782,6 +1378,8 @@ class AalenAdditiveFitter(BaseFitter):
 
         Returns the expected lifetimes for the individuals
         """
+        from scipy.integrate import trapz
+
         index = get_index(X)
         t = self.cumulative_hazards_.index
         return pd.DataFrame(trapz(self.predict_survival_function(X)[index].values.T, t), index=index)
@@ -1090,6 +1688,8 @@ class CoxPHFitter(BaseFitter):
                 self._compute_standard_errors().ix['se'])
 
     def _compute_p_values(self):
+        import scipy.stats as stats
+
         U = self._compute_z_values() ** 2
         return stats.chi2.sf(U, 1)
 
@@ -1203,6 +1803,8 @@ class CoxPHFitter(BaseFitter):
         """
         Compute the expected lifetime, E[T], using covarites X.
         """
+        from scipy.integrate import trapz
+
         index = get_index(X)
         v = self.predict_survival_function(X)[index]
         return pd.DataFrame(trapz(v.values.T, v.index), index=index)
@@ -1233,7 +1835,320 @@ class CoxPHFitter(BaseFitter):
         return baseline_hazard_
 
 
+class AlignedCurves(object):
+
+    """
+    Aligns the estimates of many fitted univariate fitters once, for arithmetic between them. The
+    estimates are step functions, so they are looked up at the sorted union of their timelines
+    with one searchsorted each, and kept as a single (timeline, fitters) matrix.
+
+    AlignedCurves(fitters, estimate=None)
+
+    fitters: a list of fitted univariate fitters.
+    estimate: the name of the estimate to align, ex: 'survival_function_'. Default each fitter's
+      main estimate: its cumulative_density_ if fitted with left_censorship, else its
+      survival_function_, else its cumulative_hazard_.
+
+    Ex:
+        curves = AlignedCurves([kmf_1, kmf_2, kmf_3])
+        curves.subtract(reference=0)  # every curve minus the first one
+        curves.pairwise('divide')     # every ratio of two curves
+
+    """
+
+    def __init__(self, fitters, estimate=None):
+        estimates = [getattr(fitter, coalesce(estimate, _estimate_name(fitter))) for fitter in fitters]
+        timelines = [e.index.values.astype(float) for e in estimates]
+        self.timeline = np.unique(np.concatenate(timelines))
+        self.labels = [e.columns[0] for e in estimates]
+
+        # before its first time, a curve is undefined.
+        self.values = np.empty((self.timeline.shape[0], len(estimates)))
+        for i, (timeline, e) in enumerate(zip(timelines, estimates)):
+            ix = np.searchsorted(timeline, self.timeline, side='right') - 1
+            self.values[:, i] = np.where(ix >= 0, e.values[np.maximum(ix, 0), 0], np.nan)
+
+    @property
+    def curves(self):
+        return self._to_dataframe(self.values)
+
+    def subtract(self, reference=0):
+        """
+        Returns a DataFrame of every curve minus the curve of the fitter at position reference.
+        """
+        return self._to_dataframe(self.values - self.values[:, [reference]])
+
+    def divide(self, reference=0):
+        """
+        Returns a DataFrame of every curve divided by the curve of the fitter at position reference.
+        """
+        return self._to_dataframe(self.values / self.values[:, [reference]])
+
+    def pairwise(self, operation='subtract'):
+        """
+        Returns an array of shape (timeline, fitters, fitters) with [:, i, j] equal to
+        curve i minus (operation='subtract') or divided by (operation='divide') curve j.
+        """
+        assert operation in ['subtract', 'divide'], "operation must be 'subtract' or 'divide'."
+        op = np.subtract if operation == 'subtract' else np.divide
+        return op(self.values[:, :, None], self.values[:, None, :])
+
+    def _to_dataframe(self, values):
+        return pd.DataFrame(values, index=pd.Index(self.timeline, name='timeline'), columns=self.labels)
+
+
 #### Utils ####
+_aalen_worker_data = None
+
+
+def _init_aalen_worker(X, T, death_rows):
+    # with fork, the arrays are inherited copy-on-write rather than pickled per task.
+    global _aalen_worker_data
+    _aalen_worker_data = (X, T, death_rows)
+
+
+def _aalen_additive_worker(args):
+    steps, penalizers = args
+    X, T, death_rows = _aalen_worker_data
+    return _aalen_additive_block(X, T, death_rows, steps, penalizers)
+
+
+def _aalen_additive_regressions(X, T, death_rows, steps, penalizers, n_jobs=1, show_progress=False):
+    """
+    Solves the penalized least-squares problems of the Aalen additive model.
+
+    Parameters:
+      X: (n,d) numpy array of covariates, sorted by T.
+      T: (n,) numpy array of sorted durations.
+      death_rows: sorted positions in X of the observed deaths.
+      steps: offsets into death_rows. Regression step g solves for the deaths
+        death_rows[steps[g]:steps[g + 1]], using the risk set at the first of them.
+      penalizers: (p,) numpy array of L2 penalizers. If p > 1, every step shares one
+        eigendecomposition of the Gram matrix between the penalizers.
+      n_jobs: the number of processes to use. The steps are split into n_jobs contiguous
+        blocks; each block builds its own starting Gram matrix. -1 uses all cores.
+      show_progress: display a progress bar. It is not shown when the steps are solved in several processes.
+
+    Returns:
+      hazards, variance: (p, n_steps, d) numpy arrays.
+    """
+    n_steps = steps.shape[0] - 1
+    if n_jobs == -1:
+        n_jobs = cpu_count()
+    n_blocks = max(1, min(n_jobs, n_steps))
+    bounds = np.linspace(0, n_steps, n_blocks + 1).astype(int)
+    blocks = [steps[bounds[b]:bounds[b + 1] + 1] for b in range(n_blocks)]
+
+    if n_blocks == 1:
+        progress = progress_bar(n_steps) if show_progress else None
+        results = [_aalen_additive_block(X, T, death_rows, steps, penalizers, progress)]
+
+        # print a new line so the console displays well
+        if show_progress:
+            print()
+    else:
+        pool = Pool(n_blocks, initializer=_init_aalen_worker, initargs=(X, T, death_rows))
+        try:
+            results = pool.map(_aalen_additive_worker, [(block, penalizers) for block in blocks])
+        finally:
+            pool.close()
+            pool.join()
+
+    hazards = np.concatenate([r[0] for r in results], axis=1)
+    variance = np.concatenate([r[1] for r in results], axis=1)
+    return hazards, variance
+
+
+def _bayesian_sample_paths(a, b, ix, n, beta):
+    """
+    (n, len(ix)) sample survival functions at the rows ix of the event table (1 before its first row).
+    """
+    samples = 1. - beta(a, b, size=(n, a.shape[0]))
+    paths = np.exp(np.log(samples).cumsum(1))
+    return np.where(ix >= 0, paths[:, np.maximum(ix, 0)], 1.)
+
+
+def _bayesian_chunk_summary(args):
+    a, b, ix, n, seed, n_lower, n_upper = args
+    paths = _bayesian_sample_paths(a, b, ix, n, np.random.RandomState(seed).beta)
+    return paths.sum(0), _smallest(paths, n_lower), _largest(paths, n_upper)
+
+
+def _merge_bayesian_summaries(s1, s2, n_lower, n_upper):
+    return (s1[0] + s2[0],
+            _smallest(np.concatenate([s1[1], s2[1]]), n_lower),
+            _largest(np.concatenate([s1[2], s2[2]]), n_upper))
+
+
+def _smallest(values, k):
+    # the k smallest of every column, unsorted.
+    return values if values.shape[0] <= k else np.partition(values, k - 1, axis=0)[:k]
+
+
+def _largest(values, k):
+    return values if values.shape[0] <= k else np.partition(values, values.shape[0] - k, axis=0)[-k:]
+
+
+def _interpolate_order_statistics(order_statistics, position, offset, n):
+    # linear interpolation between the sorted samples around position, order_statistics[0] being sample offset.
+    i = int(position)
+    lower = order_statistics[i - offset]
+    upper = order_statistics[min(i + 1, n - 1) - offset]
+    return lower + (position - i) * (upper - lower)
+
+
+def _aalen_additive_block(X, T, death_rows, steps, penalizers, progress=None):
+    """
+    Solves a contiguous block of regression steps, downdating the risk set
+    Gram matrix as individuals leave the study. See _aalen_additive_regressions.
+    """
+    from scipy.linalg import cho_factor, cho_solve
+
+    n_steps = steps.shape[0] - 1
+    d = X.shape[1]
+    hazards = np.zeros((penalizers.shape[0], n_steps, d))
+    variance = np.zeros((penalizers.shape[0], n_steps, d))
+    if n_steps == 0:
+        return hazards, variance
+
+    # the starting risk set: everyone still in the study at the block's first death.
+    start = np.searchsorted(T, T[death_rows[steps[0]]], side='left')
+    G = dot(X[start:].T, X[start:])
+    built_with = X.shape[0] - start
+
+    for g in range(n_steps):
+        rows = death_rows[steps[g]:steps[g + 1]]
+
+        # remove the individuals who left the study before this death time.
+        stop = np.searchsorted(T, T[rows[0]], side='left')
+        if 2 * (X.shape[0] - stop) < built_with:
+            # rebuild rather than downdate once the risk set has halved, to limit cancellation.
+            G = dot(X[stop:].T, X[stop:])
+            built_with = X.shape[0] - stop
+        else:
+            G -= dot(X[start:stop].T, X[start:stop])
+        start = stop
+
+        # perform linear regression step: one factorization for all the deaths at this time.
+        try:
+            if penalizers.shape[0] == 1 and penalizers[0] > 0:
+                v = cho_solve(cho_factor(G + penalizers[0] * np.eye(d)), X[rows].T)[None, :, :]
+            else:
+                v = _penalized_pseudo_solve(G, X[rows].T, penalizers)
+        except LinAlgError:
+            print("Linear regression error. Try increasing the penalizer term.")
+            raise
+
+        hazards[:, g] = v.sum(2)
+        variance[:, g] = (v ** 2).sum(2)
+
+        # update progress bar
+        if progress is not None:
+            progress.update(g)
+
+    return hazards, variance
+
+
+def _penalized_pseudo_solve(G, B, penalizers, tol=1e-10):
+    """
+    (G + p*I)^-1 B for every penalizer p, with one eigendecomposition: (G + p*I)^-1 = Q diag(1 / (eigenvalues + p)) Q^T.
+    Without a penalizer, G is singular if the risk set is smaller than the covariates (or they are collinear),
+    so directions with eigenvalues + p <= tol * max(eigenvalues + p) are dropped. That is the pseudo-inverse,
+    which gives the minimum-norm least-squares solution. tol is well above the rounding errors of downdating G.
+
+    Returns:
+      a (p, d, k) numpy array.
+    """
+    from scipy.linalg import eigh
+
+    eigenvalues, Q = eigh(G)
+    shifted = eigenvalues[None, :] + penalizers[:, None]
+    nonzero = shifted > tol * shifted.max(1)[:, None]
+    inverse = np.where(nonzero, 1. / np.where(nonzero, shifted, 1.), 0.)
+    QB = dot(Q.T, B)
+    return np.einsum('ij,pjk->pik', Q, QB[None, :, :] * inverse[:, :, None])
+
+
+def _turnbull_intervals(lower_bound, upper_bound):
+    """
+    The Turnbull intervals of the intervals (lower_bound, upper_bound], or [t, t] if lower_bound == upper_bound == t,
+    with one sweep over the sorted bounds: a Turnbull interval is a lower bound immediately followed by an upper bound.
+
+    Returns:
+      the lower and upper ends of the Turnbull intervals, and for every subject the range [start, end)
+      of the Turnbull intervals within its interval.
+    """
+    n = lower_bound.shape[0]
+    bounds = np.concatenate((lower_bound, upper_bound))
+    # at ties, the lower bounds of exact observations come first (they are "t-"), then the upper bounds,
+    # then the other lower bounds (they are open, "t+").
+    ties = np.concatenate((np.where(lower_bound == upper_bound, 0, 2), np.ones(n, dtype=int)))
+    order = np.lexsort((ties, bounds))
+    is_upper = order >= n
+    ix = np.nonzero(~is_upper[:-1] & is_upper[1:])[0]
+
+    # identical bounds are contiguous in the sweep, and a Turnbull interval starts at the last of its lower bounds
+    # and ends at the first of its upper bounds, so comparing positions in the sweep compares the bounds.
+    position = np.empty(2 * n, dtype=int)
+    position[order] = np.arange(2 * n)
+    start = np.searchsorted(ix, position[:n], side='left')
+    end = np.searchsorted(ix + 1, position[n:], side='right')
+    return bounds[order[ix]], bounds[order[ix + 1]], start, end
+
+
+def _turnbull_em_step(p, start, end, weights):
+    # the likelihood of every range of Turnbull intervals is a difference of the cumulative probabilities.
+    cumulative_p = np.concatenate(([0.], np.cumsum(p)))
+    w = weights / (cumulative_p[end] - cumulative_p[start])
+    # the sum of w over the ranges containing every Turnbull interval, as the cumulative sum of a difference array.
+    m = p.shape[0]
+    containing = np.cumsum(np.bincount(start, w, minlength=m + 1) - np.bincount(end, w, minlength=m + 1))[:m]
+    return p * containing / weights.sum()
+
+
+def _turnbull_log_likelihood(p, start, end, weights):
+    cumulative_p = np.concatenate(([0.], np.cumsum(p)))
+    with np.errstate(divide='ignore'):
+        return (weights * np.log(cumulative_p[end] - cumulative_p[start])).sum()
+
+
+def _turnbull_squarem(p, start, end, weights, epsilon, max_steps):
+    """
+    EM for the probabilities of the Turnbull intervals, accelerated by squared extrapolation (SQUAREM,
+    Varadhan and Roland 2008): from two EM steps p -> p1 -> p2, with r = p1 - p and v = p2 - 2 p1 + p, the step
+    p - 2 a r + a^2 v with a = -|r| / |v| is stabilized by a third EM step. Steps leaving the simplex or
+    decreasing the likelihood are shortened towards a = -1, which is p2.
+
+    Returns:
+      the probabilities, their log-likelihood, the number of steps and whether they converged.
+    """
+    log_likelihood = _turnbull_log_likelihood(p, start, end, weights)
+    converged = False
+    for i in range(1, max_steps + 1):
+        p1 = _turnbull_em_step(p, start, end, weights)
+        p2 = _turnbull_em_step(p1, start, end, weights)
+        r, v = p1 - p, p2 - 2 * p1 + p
+        a = min(-norm(r) / norm(v), -1.) if norm(v) > 0 else -1.
+
+        while a < -1.01:
+            p_new = p - 2 * a * r + a * a * v
+            if (p_new >= 0).all():
+                p_new = _turnbull_em_step(p_new / p_new.sum(), start, end, weights)
+                log_likelihood_new = _turnbull_log_likelihood(p_new, start, end, weights)
+                if log_likelihood_new >= log_likelihood:
+                    break
+            a = (a - 1) / 2.
+        else:
+            p_new = p2
+            log_likelihood_new = _turnbull_log_likelihood(p_new, start, end, weights)
+
+        converged = np.abs(p_new - p).max() < epsilon
+        p, log_likelihood = p_new, log_likelihood_new
+        if converged:
+            break
+    return p, log_likelihood, i, converged
+
+
 def get_index(X):
     if isinstance(X, pd.DataFrame):
         index = list(X.index)
@@ -1243,6 +2158,12 @@ def get_index(X):
     return index
 
 
+def _estimate_name(fitter):
+    if getattr(fitter, '_left_censorship', False):
+        return 'cumulative_density_'
+    return 'survival_function_' if hasattr(fitter, 'survival_function_') else 'cumulative_hazard_'
+
+
 def _subtract(self, estimate):
     class_name = self.__class__.__name__
     doc_string = """
@@ -1254,10 +2175,9 @@ def _subtract(self, estimate):
         """ % (estimate, class_name, class_name)
 
     def subtract(other):
-        self_estimate = getattr(self, estimate)
-        other_estimate = getattr(other, estimate)
-        return self_estimate.reindex(other_estimate.index, method='ffill') - \
-            other_estimate.reindex(self_estimate.index, method='ffill')
+        curves = AlignedCurves([self, other], estimate)
+        return pd.DataFrame(curves.subtract(reference=1).values[:, :1], index=curves.timeline,
+                            columns=getattr(self, estimate).columns)
 
     subtract.__doc__ = doc_string
     return subtract
@@ -1274,31 +2194,47 @@ def _divide(self, estimate):
         """ % (estimate, class_name, class_name)
 
     def divide(other):
-        self_estimate = getattr(self, estimate)
-        other_estimate = getattr(other, estimate)
-        return self_estimate.reindex(other_estimate.index, method='ffill') / \
-            other_estimate.reindex(self_estimate.index, method='ffill')
+        curves = AlignedCurves([self, other], estimate)
+        return pd.DataFrame(curves.divide(reference=1).values[:, :1], index=curves.timeline,
+                            columns=getattr(self, estimate).columns)
 
     divide.__doc__ = doc_string
     return divide
 
 
 def _predict(self, estimate, label):
-    doc_string =       """
+    doc_string = """
       Predict the %s at certain times
 
       Parameters:
-        time: an array of times to predict the value of %s at
+        time: a time, or an array of times, to predict the value of %s at
+        interpolate: if True, linearly interpolate between the times of the estimate, rather
+          than take the value of the step function. Default False
+
+      Returns:
+        a float if time is a scalar, else an array. Times before the first time of the estimate are NaN.
       """ % (estimate, estimate)
 
-    def predict(time):
-        return [getattr(self, estimate).ix[:t].iloc[-1][label] for t in time]
+    def predict(time, interpolate=False):
+        estimate_ = getattr(self, estimate)
+        timeline = estimate_.index.values.astype(float)
+        values = estimate_[label].values
+        time = np.asarray(time, dtype=float)
+
+        if interpolate:
+            v = np.interp(time, timeline, values, left=np.nan)
+        else:
+            # the step function: the value at the last time <= t.
+            ix = np.searchsorted(timeline, time, side='right') - 1
+            v = np.where(ix >= 0, values[np.maximum(ix, 0)], np.nan)
+
+        return v if v.ndim else float(v)
 
     predict.__doc__ = doc_string
     return predict
 
 
-def preprocess_inputs(durations, event_observed, timeline, entry):
+def preprocess_inputs(durations, event_observed, timeline, entry, timeline_resolution=None):
 
     n = len(durations)
     durations = np.asarray(durations).reshape((n,))
@@ -1310,13 +2246,17 @@ def preprocess_inputs(durations, event_observed, timeline, entry):
         event_observed = np.asarray(event_observed).reshape((n,)).copy().astype(int)
 
     if entry is None:
-        entry = np.zeros(n)
+        # keep integer durations integer, so their event table can take the integer fast path.
+        entry = np.zeros(n, dtype=durations.dtype if np.issubdtype(durations.dtype, np.integer) else float)
     else:
         entry = np.asarray(entry).reshape((n,))
 
     event_table = survival_table_from_events(durations, event_observed, entry)
 
-    if timeline is None:
+    assert timeline is None or timeline_resolution is None, "Cannot set both timeline and timeline_resolution."
+    if timeline_resolution is not None:
+        timeline = _timeline_grid(event_table.index.values.astype(float), timeline_resolution)
+    elif timeline is None:
         timeline = event_table.index.values
     else:
         timeline = np.asarray(timeline)
@@ -1324,9 +2264,74 @@ def preprocess_inputs(durations, event_observed, timeline, entry):
     return durations, event_observed, timeline.astype(float), entry, event_table
 
 
-def _additive_estimate(events, timeline, _additive_f, _additive_var, reverse):
+def _timeline_grid(times, timeline_resolution):
+    """
+    The multiples of timeline_resolution from the last one <= min(times) to the first one >= max(times).
+    The event table keeps every time, so that the estimates at these times are exact.
+    """
+    assert timeline_resolution > 0, "timeline_resolution must be positive."
+    first, last = np.floor(times.min() / timeline_resolution), np.ceil(times.max() / timeline_resolution)
+    return np.arange(first, last + 1) * timeline_resolution
+
+
+def preprocess_update(fitter, durations, event_observed, entry):
+    """
+    Merges new observations into a fitted univariate fitter's event table. Returns the same values
+    as preprocess_event_table, plus the first row of the event table that the new observations changed.
+    The individuals are not kept: concatenating them would cost O(all observations) per update.
     """
-    Called to compute the Kaplan Meier and Nelson-Aalen estimates.
+    _, _, _, _, event_table = preprocess_inputs(durations, event_observed, None, entry)
+    merged = EventTable(table=fitter.event_table).merge(EventTable(table=event_table)).table
+    start = np.searchsorted(merged.index.values, event_table.index.values[0])
+
+    timeline = fitter.timeline
+    if getattr(fitter, '_timeline_resolution', None) is not None:
+        # the grid grows with the event times.
+        timeline = _timeline_grid(merged.index.values.astype(float), fitter._timeline_resolution)
+    elif np.array_equal(timeline, fitter.event_table.index.values.astype(float)):
+        # the timeline was the event times, so it grows with them.
+        timeline = merged.index.values.astype(float)
+
+    return None, None, timeline, None, merged, start
+
+
+def preprocess_event_table(event_table, timeline, observed_col, censored_col, entrance_col):
+    """
+    The counterpart of preprocess_inputs for pre-aggregated counts: builds the event table the
+    fitters use (see survival_table_from_events) without expanding it to individuals.
+    """
+    if isinstance(event_table, EventTable):
+        event_table = event_table.table
+
+    times = pd.Index(np.asarray(event_table.index, dtype=float), name='event_at')
+    table = pd.DataFrame(index=times)
+    table['removed'] = event_table[observed_col].values + event_table[censored_col].values
+    table['observed'] = event_table[observed_col].values
+    table['censored'] = event_table[censored_col].values
+    if entrance_col in event_table.columns:
+        table['entrance'] = event_table[entrance_col].values
+    else:
+        # everyone enters the study at time 0.
+        table['entrance'] = 0
+        births = pd.DataFrame([[0, 0, 0, table['removed'].sum()]], columns=table.columns,
+                              index=pd.Index([0.], name='event_at'))
+        table = pd.concat([table, births])
+
+    # sorts the times, and merges repeated ones.
+    table = table.groupby(level=0).sum()
+
+    if timeline is None:
+        timeline = table.index.values
+    else:
+        timeline = np.asarray(timeline)
+
+    return None, None, timeline.astype(float), None, table
+
+
+def _additive_estimate(events, timeline, _additive_f, _additive_var, reverse, increments=None):
+    """
+    Called to compute the Kaplan Meier and Nelson-Aalen estimates. The forward estimates
+    can be passed the precomputed output of _additive_increments.
 
     """
     if reverse:
@@ -1336,10 +2341,10 @@ def _additive_estimate(events, timeline, _additive_f, _additive_var, reverse):
         estimate_ = np.cumsum(_additive_f(population, deaths)).ffill().sort_index()
         var_ = np.cumsum(_additive_var(population, deaths)).ffill().sort_index()
     else:
-        deaths = events['observed']
-        population = events['entrance'].cumsum() - events['removed'].cumsum().shift(1).fillna(0)  # slowest line here.
-        estimate_ = np.cumsum(_additive_f(population, deaths))
-        var_ = np.cumsum(_additive_var(population, deaths))
+        if increments is None:
+            increments = _additive_increments(events, _additive_f, _additive_var)
+        estimate_ = np.cumsum(increments[0])
+        var_ = np.cumsum(increments[1])
 
     timeline = sorted(timeline)
     estimate_ = estimate_.reindex(timeline, method='pad').fillna(0)
@@ -1350,42 +2355,116 @@ def _additive_estimate(events, timeline, _additive_f, _additive_var, reverse):
     return estimate_, var_
 
 
-def qth_survival_times(q, survival_functions):
+def _nelson_aalen_increments(nelson_aalen_smoothing):
+    """
+    The functions of the terms of the Nelson-Aalen estimate and of its variance, with or without
+    the smoothing of tied deaths.
     """
-    This can be done much better.
+    if nelson_aalen_smoothing:
+        return _nelson_aalen_additive_smooth, _nelson_aalen_variance_smooth
+    return _nelson_aalen_additive_discrete, _nelson_aalen_variance_discrete
 
-    Parameters:
-      q: a float between 0 and 1.
-      survival_functions: a (n,d) dataframe or numpy array.
-        If dataframe, will return index values (actual times)
-        If numpy array, will return indices.
 
-    Returns:
-      v: if d==1, returns a float, np.inf if infinity.
-         if d > 1, an DataFrame containing the first times the value was crossed.
+def _nelson_aalen_variance_smooth(population, deaths):
+    from scipy.special import polygamma
 
-    """
-    q = pd.Series(q)
-    assert (q <= 1).all() and (0 <= q).all(), 'q must be between 0 and 1'
-    survival_functions = pd.DataFrame(survival_functions)
-    if survival_functions.shape[1] == 1 and q.shape == (1,):
-        return survival_functions.apply(lambda s: qth_survival_time(q[0], s)).ix[0]
-    else:
-        return pd.DataFrame({_q: survival_functions.apply(lambda s: qth_survival_time(_q, s)) for _q in q})
+    # sum_{i=0}^{d-1} 1/(N-i)^2 == trigamma(N-d+1) - trigamma(N+1)
+    N, d = np.asarray(population, dtype=float), np.floor(np.asarray(deaths, dtype=float))
+    v = polygamma(1, N - d + 1) - polygamma(1, N + 1)
+    # the difference loses precision for large N; single deaths are common enough to be exact.
+    with np.errstate(divide='ignore'):
+        v = np.where(d == 1, 1. / N ** 2, v)
+    return pd.Series(v, index=population.index)
 
 
-def qth_survival_time(q, survival_function):
-    """
-    Expects a Pandas series, returns the time when the qth probability is reached.
-    """
-    if survival_function.iloc[-1] > q:
-        return np.inf
-    v = (survival_function <= q).idxmax(0)
-    return v
+def _nelson_aalen_variance_discrete(population, deaths):
+    return 1. * (population - deaths) * deaths / population ** 3
+
 
+def _nelson_aalen_additive_smooth(population, deaths):
+    from scipy.special import digamma
 
-def median_survival_times(survival_functions):
-    return qth_survival_times(0.5, survival_functions)
+    # sum_{i=0}^{d-1} 1/(N-i) == digamma(N+1) - digamma(N-d+1)
+    N, d = np.asarray(population, dtype=float), np.floor(np.asarray(deaths, dtype=float))
+    v = digamma(N + 1) - digamma(N - d + 1)
+    with np.errstate(divide='ignore'):
+        v = np.where(d == 1, 1. / N, v)
+    return pd.Series(v, index=population.index)
+
+
+def _nelson_aalen_additive_discrete(population, deaths):
+    return (1. * deaths / population).replace([np.inf], 0)
+
+
+def _nelson_aalen_bounds(cumulative_hazard_, cumulative_sq_, alpha):
+    # the upper and lower bounds of the log-transformed confidence intervals.
+    alpha2 = inv_normal_cdf(1 - (1 - alpha) / 2)
+    upper = cumulative_hazard_ * np.exp(alpha2 * np.sqrt(cumulative_sq_) / cumulative_hazard_)
+    lower = cumulative_hazard_ * np.exp(-alpha2 * np.sqrt(cumulative_sq_) / cumulative_hazard_)
+    return upper, lower
+
+
+def _grouped_additive_estimate(durations, event_observed, groups, entry, _additive_f, _additive_var):
+    """
+    The forward additive estimates of every group at once, see fit_groups.
+
+    Returns:
+      index: a MultiIndex of (group, timeline), with the times of each group's event table.
+      estimate_, var_: arrays of the estimates and their variances at index.
+    """
+    assert groups is not None, "fit_groups requires groups, the group of each subject."
+    n = len(durations)
+    durations = np.asarray(durations, dtype=float).reshape((n,))
+    event_observed = np.ones(n) if event_observed is None else np.asarray(event_observed, dtype=float).reshape((n,))
+    entry = np.zeros(n) if entry is None else np.asarray(entry, dtype=float).reshape((n,))
+    labels, codes = np.unique(np.asarray(groups).reshape((n,)), return_inverse=True)
+
+    # one row per removal (at duration + entry, like survival_table_from_events) and one per entrance,
+    # sorted by (group, time). Equal (group, time) rows are then counted together.
+    g = np.r_[codes, codes]
+    t = np.r_[durations + entry, entry]
+    order = np.lexsort((t, g))
+    g, t = g[order], t[order]
+    new_row = np.r_[True, (g[1:] != g[:-1]) | (t[1:] != t[:-1])]
+    row = np.cumsum(new_row) - 1
+
+    removed = np.bincount(row, weights=np.r_[np.ones(n), np.zeros(n)][order])
+    observed = np.bincount(row, weights=np.r_[event_observed, np.zeros(n)][order])
+    entrance = np.bincount(row, weights=np.r_[np.zeros(n), np.ones(n)][order])
+    g, t = g[new_row], t[new_row]
+
+    # segmented cumulative sums: each group's sums restart at its first row.
+    counts = pd.DataFrame({'removed': removed, 'entrance': entrance}).groupby(g).cumsum()
+    population = pd.Series(counts['entrance'].values - counts['removed'].values + removed)
+    deaths = pd.Series(observed)
+    terms = pd.DataFrame({'estimate': np.asarray(_additive_f(population, deaths)),
+                          'var': np.asarray(_additive_var(population, deaths))}).groupby(g).cumsum()
+
+    index = pd.MultiIndex.from_arrays([labels[g], t], names=['group', 'timeline'])
+    return index, terms['estimate'].values, terms['var'].values
+
+
+def _grouped_result(index, values, columns, wide):
+    df = pd.DataFrame(np.column_stack(values), index=index, columns=columns)
+    if wide:
+        return df[columns[0]].unstack(level=0).ffill()
+    return df
+
+
+def _additive_increments(events, _additive_f, _additive_var, start=0, previous=None):
+    """
+    The terms of the forward additive estimates at each time of the event table. If previous are the
+    terms of an event table that is equal to events before row start, only the rows from start on
+    are recomputed.
+    """
+    deaths = events['observed']
+    population = events['entrance'].cumsum() - events['removed'].cumsum().shift(1).fillna(0)  # slowest line here.
+    if previous is None or start == 0:
+        return _additive_f(population, deaths), _additive_var(population, deaths)
+
+    deaths, population = deaths.iloc[start:], population.iloc[start:]
+    return (pd.concat([previous[0].iloc[:start], _additive_f(population, deaths)]),
+            pd.concat([previous[1].iloc[:start], _additive_var(population, deaths)]))
 
 
 def asymmetric_epanechnikov_kernel(q, x):
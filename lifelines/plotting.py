@@ -3,10 +3,11 @@ from __future__ import print_function
 
 # plotting
 import numpy as np
-from matplotlib import pyplot as plt
 
 from lifelines.utils import coalesce
 
+# matplotlib is only imported when something is plotted, so that fitting doesn't pay for it.
+
 
 def plot_lifetimes(lifetimes, event_observed=None, birthtimes=None, order=False):
     """
@@ -20,6 +21,8 @@ def plot_lifetimes(lifetimes, event_observed=None, birthtimes=None, order=False)
     examples:
 
     """
+    from matplotlib import pyplot as plt
+
     N = lifetimes.shape[0]
     if N > 100:
         print("warning: you may want to subsample to less than 100 individuals.")
@@ -49,6 +52,8 @@ def plot_lifetimes(lifetimes, event_observed=None, birthtimes=None, order=False)
 
 
 def shaded_plot(x, y, y_upper, y_lower, **kwargs):
+    from matplotlib import pyplot as plt
+
     ax = kwargs.pop('ax', plt.gca())
     base_line, = ax.plot(x, y, drawstyle='steps-post', **kwargs)
     fill_between_steps(x, y_lower, y2=y_upper, ax=ax, alpha=0.25, color=base_line.get_color(), linewidth=1.0)
@@ -68,6 +73,8 @@ def plot_regressions(self):
           legend: show legend in figure.
 
         """
+        from matplotlib import pyplot as plt
+
         assert (ix is None or iloc is None), 'Cannot set both ix and iloc in call to .plot'
 
         get_method = "ix" if ix is not None else "iloc"
@@ -126,6 +133,8 @@ def plot_estimate(self, estimate):
              ci_legend=False, ci_force_lines=False, ci_alpha=0.25, ci_show=True,
              bandwidth=None, **kwargs):
 
+        from matplotlib import pyplot as plt
+
         assert (ix is None or iloc is None), 'Cannot set both ix and iloc in call to .plot().'
 
         if "ax" not in kwargs:
@@ -204,6 +213,7 @@ def fill_between_steps(x, y1, y2=0, h_align='left', ax=None, **kwargs):
     '''
     # If no Axes opject given, grab the current one:
     if ax is None:
+        from matplotlib import pyplot as plt
         ax = plt.gca()
     # First, duplicate the x values
     xx = x.repeat(2)[1:]
@@ -12,10 +12,6 @@ from __future__ import print_function
 import sys
 import time
 import uuid
-try:
-    from IPython.core.display import HTML, Javascript, display
-except ImportError:
-    pass
 
 __all__ = ['progress_bar']
 
@@ -89,6 +85,8 @@ def ipythonprint(s):
 class IPythonNotebookPB(ProgressBar):
 
     def __init__(self, iterations):
+        from IPython.core.display import HTML, display
+
         self.divid = str(uuid.uuid4())
         self.sec_id = str(uuid.uuid4())
 
@@ -104,6 +102,8 @@ class IPythonNotebookPB(ProgressBar):
         super(IPythonNotebookPB, self).__init__(iterations)
 
     def animate(self, i, elapsed):
+        from IPython.core.display import Javascript, display
+
         percentage = int(self.fraction(i))
 
         display(Javascript(
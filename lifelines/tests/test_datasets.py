@@ -0,0 +1,43 @@
+# test_datasets.py
+from __future__ import print_function
+import os
+
+import pandas as pd
+import numpy.testing as npt
+
+from .. import datasets
+from ..datasets import load_dataset, load_larynx, load_waltons
+
+
+def test_load_dataset_returns_the_same_data_as_read_csv():
+    expected = pd.read_csv(os.path.join(datasets.DATASETS_DIR, 'larynx.csv'))
+    npt.assert_array_equal(load_larynx().values, expected.values)
+    npt.assert_array_equal(load_larynx(usecols=['time', 'death']).values, expected[['time', 'death']].values)
+
+
+def test_load_dataset_returns_copies_of_the_cached_dataset():
+    datasets.clear_cache()
+    df = load_waltons()
+    df['T'] = -1
+    assert (load_waltons()['T'] > 0).all()
+
+
+def test_load_dataset_cache_keeps_the_most_recently_used(monkeypatch):
+    monkeypatch.setattr(datasets, 'CACHE_SIZE', 2)
+    datasets.clear_cache()
+    for filename in ['larynx.csv', 'rossi.csv', 'larynx.csv', 'lung.csv']:
+        load_dataset(filename)
+    assert list(datasets._cache) == [('larynx.csv', None), ('lung.csv', None)]
+
+
+def test_load_dataset_disk_cache(tmpdir, monkeypatch):
+    monkeypatch.setenv('LIFELINES_CACHE_DIR', str(tmpdir))
+    datasets.clear_cache()
+    expected = load_dataset('rossi.csv')
+    datasets.clear_cache()
+    npt.assert_array_equal(load_dataset('rossi.csv', disk_cache=True).values, expected.values)
+    assert len(tmpdir.listdir()) == 1
+
+    datasets.clear_cache()
+    npt.assert_array_equal(load_dataset('rossi.csv', disk_cache=True).values, expected.values)
+    assert len(tmpdir.listdir()) == 1
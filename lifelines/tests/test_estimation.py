@@ -11,11 +11,12 @@ from pandas.util.testing import assert_frame_equal
 import numpy.testing as npt
 
 from ..utils import k_fold_cross_validation, StatError
-from ..estimation import CoxPHFitter, AalenAdditiveFitter, KaplanMeierFitter, NelsonAalenFitter, BreslowFlemingHarringtonFitter
+from ..estimation import CoxPHFitter, AalenAdditiveFitter, KaplanMeierFitter, NelsonAalenFitter, BreslowFlemingHarringtonFitter, \
+    AlignedCurves, BayesianFitter, TurnbullFitter
 from ..datasets import load_regression_dataset, load_larynx, load_waltons, load_kidney_transplant, load_rossi,\
     load_lcd, load_panel_test
 from ..generate_datasets import generate_hazard_rates, generate_random_lifetimes, cumulative_integral
-from ..utils import concordance_index
+from ..utils import concordance_index, survival_table_from_events, EventTable
 
 
 @pytest.fixture
@@ -115,6 +116,35 @@ class TestUnivariateFitters():
         with_list = naf.fit(list(T), list(C)).cumulative_hazard_
         assert_frame_equal(with_list, with_array)
 
+    def test_predict_methods_return_the_step_function_or_its_interpolation(self, sample_lifetimes):
+        for f, estimate in [(KaplanMeierFitter(), 'survival_function_'), (NelsonAalenFitter(), 'cumulative_hazard_')]:
+            f.fit(*sample_lifetimes)
+            estimate_ = getattr(f, estimate)
+            times = np.linspace(0, 25, 51)
+            expected = [estimate_.ix[:t].iloc[-1, 0] for t in times]
+            npt.assert_array_almost_equal(f.predict(times), expected)
+            assert isinstance(f.predict(times[7]), float)
+            assert np.isnan(f.predict(-1.))
+            npt.assert_array_almost_equal(f.predict(times, interpolate=True),
+                                          np.interp(times, estimate_.index.values, estimate_.values[:, 0]))
+
+    def test_confidence_intervals_are_recomputed_when_alpha_changes(self, sample_lifetimes):
+        for f in [KaplanMeierFitter(), NelsonAalenFitter(), BreslowFlemingHarringtonFitter()]:
+            f.fit(*sample_lifetimes)
+            ci = f.confidence_interval_
+            assert f.confidence_interval_ is ci
+            f.alpha = 0.8
+            assert f.confidence_interval_ is not ci
+            assert f.confidence_interval_.columns[0].endswith('0.80')
+            npt.assert_array_almost_equal(f.confidence_interval_.values,
+                                          f.__class__(alpha=0.8).fit(*sample_lifetimes).confidence_interval_.values)
+
+            # the alpha of fit is the fitter's alpha until it changes, too.
+            f.fit(*sample_lifetimes, alpha=0.9)
+            assert f.confidence_interval_.columns[0].endswith('0.90')
+            f.alpha = 0.8
+            assert f.confidence_interval_.columns[0].endswith('0.80')
+
     def test_subtraction_function(self, sample_lifetimes):
         for f in [KaplanMeierFitter(), NelsonAalenFitter()]:
             f.fit(sample_lifetimes[0])
@@ -125,6 +155,80 @@ class TestUnivariateFitters():
             f.fit(sample_lifetimes[0])
             npt.assert_array_almost_equal(np.log(f.divide(f)).sum().values, 0.0)
 
+    def test_fit_from_event_table_is_equal_to_fit(self, sample_lifetimes):
+        T, C = sample_lifetimes
+        table = survival_table_from_events(T, C, np.zeros_like(T))
+        for f, estimate in [(KaplanMeierFitter(), 'survival_function_'), (NelsonAalenFitter(), 'cumulative_hazard_'),
+                            (BreslowFlemingHarringtonFitter(), 'survival_function_')]:
+            expected = getattr(f.fit(T, C), estimate)
+            expected_ci = f.confidence_interval_
+            for t in [table, table[['observed', 'censored']]]:
+                npt.assert_array_almost_equal(getattr(f.fit_from_event_table(t), estimate).values, expected.values)
+                npt.assert_array_almost_equal(f.confidence_interval_.values, expected_ci.values)
+
+    def test_fit_from_merged_event_tables_is_equal_to_fit(self, sample_lifetimes):
+        T, C = sample_lifetimes
+        table = EventTable(T[:10], C[:10]).merge(EventTable(T[10:], C[10:]))
+        for f, estimate in [(KaplanMeierFitter(), 'survival_function_'), (NelsonAalenFitter(), 'cumulative_hazard_')]:
+            expected = getattr(f.fit(T, C), estimate)
+            npt.assert_array_almost_equal(getattr(f.fit_from_event_table(table), estimate).values, expected.values)
+
+    def test_update_is_equal_to_fit_with_all_observations(self):
+        T, C = np.random.exponential(10, size=100), np.random.binomial(1, 0.7, size=100)
+        entry = np.random.uniform(0, 2, size=100)
+        for f, estimate in [(KaplanMeierFitter(), 'survival_function_'), (NelsonAalenFitter(), 'cumulative_hazard_')]:
+            for E in [None, entry]:
+                expected = getattr(f.fit(T, C, entry=E), estimate)
+                f.fit(T[:50], C[:50], entry=None if E is None else E[:50])
+                f.update(T[50:], C[50:], entry=None if E is None else E[50:])
+                npt.assert_array_almost_equal(getattr(f, estimate).values, expected.values)
+                assert f.durations is None
+
+    def test_fit_groups_is_equal_to_a_fit_per_group(self):
+        T, C = np.random.exponential(10, size=200), np.random.binomial(1, 0.7, size=200)
+        groups = np.random.choice(['a', 'b', 'c'], size=200)
+        for f, estimate in [(KaplanMeierFitter(), 'survival_function_'), (NelsonAalenFitter(), 'cumulative_hazard_'),
+                            (BreslowFlemingHarringtonFitter(), 'survival_function_')]:
+            long_ = f.fit_groups(T, C, groups)
+            wide = f.fit_groups(T, C, groups, wide=True)
+            for group in ['a', 'b', 'c']:
+                ix = groups == group
+                expected = getattr(f.fit(T[ix], C[ix]), estimate)
+                npt.assert_array_almost_equal(long_.ix[group].values, np.c_[expected.values, f.confidence_interval_.values])
+                npt.assert_array_almost_equal(wide[group].ix[expected.index].values, expected.values[:, 0])
+
+    def test_fit_groups_requires_groups(self):
+        T = np.random.exponential(10, size=20)
+        for f in [KaplanMeierFitter(), NelsonAalenFitter(), BreslowFlemingHarringtonFitter()]:
+            with pytest.raises(AssertionError):
+                f.fit_groups(T)
+
+    def test_aligned_curves_are_the_step_functions_on_the_union_of_timelines(self):
+        fitters = [KaplanMeierFitter().fit(np.random.exponential(10, size=50), label=str(i)) for i in range(3)]
+        curves = AlignedCurves(fitters)
+        timeline = np.unique(np.concatenate([f.timeline for f in fitters]))
+        npt.assert_array_equal(curves.timeline, timeline)
+        for i, f in enumerate(fitters):
+            npt.assert_array_almost_equal(curves.curves[str(i)].values, f.predict(timeline))
+            npt.assert_array_almost_equal(curves.subtract(reference=i).values, curves.pairwise('subtract')[:, :, i])
+            npt.assert_array_almost_equal(curves.divide(reference=i).values, curves.pairwise('divide')[:, :, i])
+        pair_timeline = np.unique(np.r_[fitters[0].timeline, fitters[1].timeline])
+        npt.assert_array_almost_equal(fitters[0].subtract(fitters[1]).values[:, 0],
+                                      fitters[0].predict(pair_timeline) - fitters[1].predict(pair_timeline))
+
+    def test_timeline_resolution_gives_the_exact_estimates_at_the_multiples_of_the_resolution(self):
+        T, C = np.random.exponential(100, size=500).round(2), np.random.binomial(1, 0.7, size=500)
+        for f, estimate in [(KaplanMeierFitter(), 'survival_function_'), (NelsonAalenFitter(), 'cumulative_hazard_'),
+                            (BreslowFlemingHarringtonFitter(), 'survival_function_')]:
+            f.fit(T, C, timeline_resolution=10)
+            coarse, coarse_ci = getattr(f, estimate), f.confidence_interval_
+            npt.assert_array_almost_equal(f.timeline, np.arange(0, np.ceil(T.max() / 10) + 1) * 10)
+
+            f.fit(T, C)
+            npt.assert_array_almost_equal(coarse.values[:, 0], f.predict(coarse.index.values))
+            f.fit(T, C, timeline=coarse.index.values)
+            npt.assert_array_almost_equal(coarse_ci.values, f.confidence_interval_.values)
+
 
 class TestKaplanMeierFitter():
 
@@ -176,6 +280,21 @@ class TestKaplanMeierFitter():
         kmf = KaplanMeierFitter()
         assert_frame_equal(kmf.fit(T).survival_function_, kmf.fit(sorted(T)).survival_function_)
 
+    def test_conditional_time_to_is_the_median_and_mean_remaining_lifetime(self, sample_lifetimes):
+        kmf = KaplanMeierFitter().fit(*sample_lifetimes)
+        survival = kmf.survival_function_['KM-estimate']
+        median_ = kmf.conditional_time_to().values[:, 0]
+        mean_ = kmf.conditional_mean_time_to().values[:, 0]
+        times = survival.index.values
+        for i, t in enumerate(times):
+            if survival.iloc[i] == 0:
+                assert np.isnan(median_[i]) and np.isnan(mean_[i])
+                continue
+            crossed = survival[survival <= survival.iloc[i] / 2]
+            assert median_[i] == (crossed.index[0] - t if crossed.shape[0] else np.inf)
+            area = (survival.values[i:-1] * np.diff(times[i:])).sum()
+            npt.assert_almost_equal(mean_[i], area / survival.iloc[i])
+
     def test_passing_in_left_censorship_creates_a_cumulative_density(self, sample_lifetimes):
         T, C = sample_lifetimes
         kmf = KaplanMeierFitter()
@@ -244,6 +363,15 @@ class TestNelsonAalenFitter():
         naf.fit(T, C)
         npt.assert_almost_equal(naf.cumulative_hazard_.values, self.nelson_aalen(T, C))
 
+    def test_smoothed_tie_sums_are_equal_to_the_explicit_sums(self):
+        naf = NelsonAalenFitter()
+        population = pd.Series([10., 5., 3., 3., 1., 250.])
+        deaths = pd.Series([3., 0., 3., 1., 1., 40.])
+        additive = [sum(1. / (N - i) for i in range(int(d))) for N, d in zip(population, deaths)]
+        variance = [sum(1. / (N - i) ** 2 for i in range(int(d))) for N, d in zip(population, deaths)]
+        npt.assert_almost_equal(naf._additive_f_smooth(population, deaths).values, additive)
+        npt.assert_almost_equal(naf._variance_f_smooth(population, deaths).values, variance)
+
     def test_ix_slicing(self, waltons_dataset):
         naf = NelsonAalenFitter().fit(waltons_dataset['T'])
         assert naf.cumulative_hazard_.ix[0:10].shape[0] == 4
@@ -275,6 +403,15 @@ class TestNelsonAalenFitter():
         naf.fit(T)
         naf.smoothed_hazard_(1.)
 
+    def test_smoothing_hazard_on_a_coarse_timeline(self):
+        T = np.random.exponential(20, size=300)
+        naf = NelsonAalenFitter()
+        naf.fit(T)
+        grid = naf.timeline[::10]
+        df = naf.smoothed_hazard_(5., timeline=grid)
+        npt.assert_array_equal(df.index.values, grid)
+        npt.assert_almost_equal(df.values, naf.smoothed_hazard_(5.).iloc[::10].values)
+
     def test_smoothing_hazard_with_spike_at_time_0(self):
         T = np.random.binomial(20, 0.7, size=300)
         T[np.random.binomial(1, 0.3, size=300).astype(bool)] = 0
@@ -295,6 +432,80 @@ class TestBreslowFlemingHarringtonFitter():
         bfh.fit(observations, entry=births)
         return
 
+    def test_BHF_is_the_exponential_of_the_negative_NA_estimate(self, sample_lifetimes):
+        for nelson_aalen_smoothing in [True, False]:
+            naf = NelsonAalenFitter(nelson_aalen_smoothing=nelson_aalen_smoothing)
+            naf.fit(*sample_lifetimes, label='BFH-estimate')
+            bfh = BreslowFlemingHarringtonFitter(nelson_aalen_smoothing=nelson_aalen_smoothing).fit(*sample_lifetimes)
+            npt.assert_array_almost_equal(bfh.survival_function_.values, np.exp(-naf.cumulative_hazard_.values))
+            npt.assert_array_almost_equal(bfh.confidence_interval_.values, np.exp(-naf.confidence_interval_.values))
+            npt.assert_array_equal(bfh.confidence_interval_.columns, naf.confidence_interval_.columns)
+
+
+class TestBayesianFitter():
+
+    def test_credible_bands_are_equal_to_the_percentiles_of_the_samples(self, sample_lifetimes):
+        bf = BayesianFitter(samples=500).fit(*sample_lifetimes, timeline=np.linspace(-1, 25, 30))
+        bands = bf.sample_credible_bands(500, chunksize=64, alpha=0.9, random_state=0)
+
+        seeds = np.random.RandomState(0).randint(0, 2 ** 31 - 1, size=8)
+        paths = []
+        for seed, size in zip(seeds, [64] * 7 + [52]):
+            np.random.seed(seed)
+            paths.append(bf.generate_sample_path(size).values)
+        paths = np.concatenate(paths, axis=1)
+
+        npt.assert_array_almost_equal(bands['mean'].values, paths.mean(1))
+        npt.assert_array_almost_equal(bands['lower_0.90'].values, np.percentile(paths, 5, axis=1))
+        npt.assert_array_almost_equal(bands['upper_0.90'].values, np.percentile(paths, 95, axis=1))
+
+    def test_credible_bands_do_not_depend_on_n_jobs(self, sample_lifetimes):
+        bf = BayesianFitter(samples=500).fit(*sample_lifetimes, chunksize=100, random_state=0)
+        npt.assert_array_almost_equal(bf.credible_bands_.values,
+                                      bf.sample_credible_bands(500, chunksize=100, n_jobs=2, random_state=0).values)
+
+    def test_fitting_with_chunksize_replaces_the_samples_with_the_bands(self, sample_lifetimes):
+        bf = BayesianFitter(samples=100).fit(*sample_lifetimes)
+        bf.fit(*sample_lifetimes, chunksize=50)
+        assert hasattr(bf, 'credible_bands_') and not hasattr(bf, 'sample_survival_functions_')
+        bf.fit(*sample_lifetimes)
+        assert hasattr(bf, 'sample_survival_functions_') and not hasattr(bf, 'credible_bands_')
+
+
+class TestTurnbullFitter():
+
+    def test_turnbull_is_equal_to_kaplan_meier_without_interval_censoring(self, sample_lifetimes):
+        T, E = sample_lifetimes
+        tf = TurnbullFitter().fit(T, np.where(E, T, np.inf))
+        kmf = KaplanMeierFitter().fit(T, E)
+        npt.assert_array_almost_equal(tf.predict(kmf.timeline), kmf.survival_function_.values[:, 0], decimal=5)
+
+    def test_turnbull_intervals(self):
+        tf = TurnbullFitter().fit([0, 1, 2, 2, 4], [3, 4, 2, 5, np.inf])
+        npt.assert_array_equal(tf.turnbull_intervals_[['lower', 'upper']].values, [[2, 2], [2, 3], [4, 5]])
+        npt.assert_almost_equal(tf.turnbull_intervals_['probability'].sum(), 1)
+
+    def test_turnbull_is_equal_to_plain_em(self):
+        np.random.seed(0)
+        lower = np.random.randint(10, size=50).astype(float)
+        upper = lower + np.random.randint(1, 4, size=50)
+        tf = TurnbullFitter(epsilon=1e-12).fit(lower, upper)
+
+        intervals = tf.turnbull_intervals_
+        A = ((lower[:, None] <= intervals['lower'].values) & (intervals['upper'].values <= upper[:, None])).astype(float)
+        p = np.ones(A.shape[1]) / A.shape[1]
+        for _ in range(20000):
+            p = p * A.T.dot(1 / A.dot(p)) / A.shape[0]
+        npt.assert_array_almost_equal(intervals['probability'].values, p)
+        npt.assert_almost_equal(tf.log_likelihood_, np.log(A.dot(p)).sum())
+        assert tf.converged_
+
+    def test_turnbull_reports_when_it_runs_out_of_steps(self):
+        np.random.seed(0)
+        lower = np.random.exponential(10, size=200)
+        tf = TurnbullFitter(max_steps=2).fit(lower, lower + np.random.exponential(3, size=200))
+        assert not tf.converged_ and tf.steps_ == 2
+
 
 class TestRegressionFitters():
 
@@ -764,6 +975,120 @@ class TestAalenAdditiveFitter():
                           index=['a', 'b', 'c'])
         aaf.fit(df, duration_col='duration', event_col='done_feeding')
 
+    def test_time_varying_predictions_with_constant_covariates_equal_static_predictions(self):
+        rossi = load_rossi()
+        aaf = AalenAdditiveFitter()
+        aaf.fit(rossi, duration_col='week', event_col='arrest', show_progress=False)
+
+        covariates = rossi.drop(['week', 'arrest'], axis=1)
+        long_format = covariates.copy()
+        long_format['id'] = np.arange(rossi.shape[0])
+        long_format['T'] = 1
+        static = aaf.predict_cumulative_hazard(covariates)
+        varying = aaf.predict_cumulative_hazard(long_format, id_col='id', duration_col='T')
+        npt.assert_almost_equal(static.values, varying.values)
+
+    def test_time_varying_predictions_integrate_each_row_over_its_period(self):
+        rossi = load_rossi()
+        aaf = AalenAdditiveFitter()
+        aaf.fit(rossi, duration_col='week', event_col='arrest', show_progress=False)
+
+        # the subject has the covariates of the first row up to week 20, and of the second row after.
+        covariates = rossi.drop(['week', 'arrest'], axis=1).iloc[:2]
+        long_format = covariates.copy()
+        long_format['id'] = 0
+        long_format['T'] = [20, 52]
+        static = aaf.predict_cumulative_hazard(covariates).values
+        varying = aaf.predict_cumulative_hazard(long_format, id_col='id', duration_col='T').values[:, 0]
+
+        before = aaf.timeline <= 20
+        at_20 = before.sum() - 1
+        npt.assert_almost_equal(varying[before], static[before, 0])
+        npt.assert_almost_equal(varying[~before], static[at_20, 0] + static[~before, 1] - static[at_20, 1])
+
+    def test_tied_deaths_are_solved_in_one_step_per_unique_time(self):
+        n = 200
+        X = pd.DataFrame(np.random.randn(n, 2), columns=['x1', 'x2'])
+        X['T'] = np.random.randint(1, 10, size=n)
+        X['E'] = np.random.binomial(1, 0.8, size=n)
+        aaf = AalenAdditiveFitter()
+        aaf.fit(X, show_progress=False)
+        death_times = np.unique(X['T'][X['E'] == 1])
+        npt.assert_array_equal(aaf.hazards_.index.values, death_times)
+
+        covariates = np.c_[X[['x1', 'x2']].values, np.ones(n)]
+        for t in death_times:
+            at_risk = covariates[X['T'].values >= t]
+            deaths = covariates[(X['T'].values == t) & (X['E'].values == 1)]
+            v = np.linalg.solve(np.dot(at_risk.T, at_risk) + aaf.penalizer * np.eye(3), deaths.T)
+            npt.assert_almost_equal(aaf.hazards_.ix[t].values, v.sum(1))
+            npt.assert_almost_equal(aaf.variance_.ix[t].values, (v ** 2).sum(1))
+
+    def test_unpenalized_fit_with_late_risk_sets_smaller_than_the_covariates(self):
+        n = 30
+        X = pd.DataFrame(np.random.randn(n, 3), columns=['x1', 'x2', 'x3'])
+        X['T'] = np.arange(1, n + 1)
+        X['E'] = 1
+        aaf = AalenAdditiveFitter(penalizer=0.)
+        aaf.fit(X, show_progress=False)
+        assert np.isfinite(aaf.cumulative_hazards_.values).all()
+
+    def test_fit_path_agrees_with_fitting_each_penalizer(self):
+        rossi = load_rossi()
+        penalizers = [0.1, 1.0, 10.0]
+        path = AalenAdditiveFitter().fit_path(rossi, penalizers, duration_col='week', event_col='arrest', show_progress=False)
+        for penalizer in penalizers:
+            aaf = AalenAdditiveFitter(penalizer=penalizer)
+            aaf.fit(rossi, duration_col='week', event_col='arrest', show_progress=False)
+            assert aaf.cumulative_hazards_.shape[0] > 2
+            npt.assert_almost_equal(path.ix[penalizer].values, aaf.cumulative_hazards_.values)
+
+    def test_fit_path_without_penalizer_agrees_with_fit_when_late_risk_sets_are_rank_deficient(self):
+        n = 30
+        X = pd.DataFrame(np.random.randn(n, 3), columns=['x1', 'x2', 'x3'])
+        X['T'] = np.arange(1, n + 1)
+        X['E'] = 1
+        aaf = AalenAdditiveFitter(penalizer=0.)
+        aaf.fit(X, show_progress=False)
+        for penalizers in [[0., 1.], [0.]]:
+            path = aaf.fit_path(X, penalizers, show_progress=False)
+            npt.assert_almost_equal(path.ix[0.].values, aaf.cumulative_hazards_.values)
+
+    def test_time_bins_reports_estimates_on_a_coarse_timeline(self):
+        rossi = load_rossi()
+        aaf = AalenAdditiveFitter()
+        aaf.fit(rossi, duration_col='week', event_col='arrest', show_progress=False, time_bins=3)
+        # three bins of about equal numbers of deaths, each reported at its last death time.
+        npt.assert_array_equal(aaf.cumulative_hazards_.index.values, [20, 37, 52])
+
+    def test_time_bins_split_at_every_death_time_is_the_full_fit(self):
+        rossi = load_rossi()
+        aaf = AalenAdditiveFitter()
+        full = aaf.fit(rossi, duration_col='week', event_col='arrest', show_progress=False).cumulative_hazards_
+        binned = aaf.fit(rossi, duration_col='week', event_col='arrest', show_progress=False,
+                         time_bins=full.index.values).cumulative_hazards_
+        assert_frame_equal(full, binned)
+
+    def test_multiple_jobs_give_the_same_estimates_as_one(self):
+        rossi = load_rossi()
+        aaf = AalenAdditiveFitter()
+        single = aaf.fit(rossi, duration_col='week', event_col='arrest', show_progress=False)
+        single_hazards, single_variance = single.hazards_.values, single.variance_.values
+        multiple = aaf.fit(rossi, duration_col='week', event_col='arrest', show_progress=False, n_jobs=3)
+        assert single_hazards.shape[0] > 3
+        npt.assert_almost_equal(single_hazards, multiple.hazards_.values)
+        npt.assert_almost_equal(single_variance, multiple.variance_.values)
+
+    def test_all_cores_or_more_jobs_than_death_times_give_the_same_estimates_as_one(self):
+        X = pd.DataFrame(np.random.randn(40, 2), columns=['x1', 'x2'])
+        X['T'] = np.random.randint(1, 4, size=40)
+        X['E'] = 1
+        aaf = AalenAdditiveFitter()
+        single = aaf.fit(X, show_progress=False).cumulative_hazards_.values
+        for n_jobs in [-1, 10]:
+            multiple = aaf.fit(X, show_progress=False, n_jobs=n_jobs).cumulative_hazards_.values
+            npt.assert_almost_equal(single, multiple)
+
     def test_crossval_for_aalen_add(self, data_pred2, data_pred1):
         aaf = AalenAdditiveFitter()
         for data_pred in [data_pred1, data_pred2]:
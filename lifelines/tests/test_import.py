@@ -0,0 +1,46 @@
+from __future__ import print_function
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+
+# modules that are slow to import, and only needed for plotting, regression models or the c-index.
+HEAVY_MODULES = ['matplotlib', 'IPython', 'scipy.stats', 'scipy.integrate', 'scipy.linalg', 'scipy.special',
+                 'lifelines._utils']
+
+
+def modules_imported_by(code):
+    script = code + "\nimport sys\nprint('\\n'.join(sys.modules))"
+    output = subprocess.check_output([sys.executable, '-c', script])
+    return set(output.decode('utf-8').split())
+
+
+def best_import_time(code, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', code])
+        times.append(time.time() - start)
+    return min(times)
+
+
+def test_importing_lifelines_does_not_import_heavy_modules():
+    imported = modules_imported_by("import lifelines")
+    assert not imported.intersection(HEAVY_MODULES)
+
+
+def test_fitting_kaplan_meier_does_not_import_heavy_modules():
+    imported = modules_imported_by("from lifelines import KaplanMeierFitter\n"
+                                   "KaplanMeierFitter().fit([1, 2, 3, 4, 5], [1, 0, 1, 1, 0]).survival_function_")
+    assert not imported.intersection(HEAVY_MODULES)
+
+
+@pytest.mark.skipif("LIFELINES_BENCHMARK" not in os.environ, reason="benchmark, set LIFELINES_BENCHMARK to run")
+def test_report_import_time():
+    # reports rather than asserts: wall-clock times are too noisy for the unit tests.
+    dependencies = best_import_time("import numpy, pandas")
+    lifelines = best_import_time("import lifelines")
+    print("import lifelines: %.2f sec, numpy and pandas: %.2f sec" % (lifelines, dependencies))
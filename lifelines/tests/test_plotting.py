@@ -4,7 +4,7 @@ import os
 import pytest
 from matplotlib import pyplot as plt
 import numpy as np
-from ..estimation import NelsonAalenFitter, KaplanMeierFitter, AalenAdditiveFitter
+from ..estimation import NelsonAalenFitter, KaplanMeierFitter, AalenAdditiveFitter, BayesianFitter
 from ..generate_datasets import generate_random_lifetimes, generate_hazard_rates
 from ..plotting import plot_lifetimes
 
@@ -166,3 +166,11 @@ class TestPlotting():
         kmf.fit(data1, label='test label 1')
         ax = kmf.plot(flat=True, censor_styles={'marker': '+', 'mew': 2, 'ms': 7})
         return
+
+    def test_bayesian_plotting_of_samples_and_of_credible_bands(self):
+        T = np.random.exponential(10, size=50)
+        bf = BayesianFitter(samples=200)
+        ax = bf.fit(T).plot()
+        bf.fit(T, chunksize=50).plot(ax=ax, color='r')
+        plt.title("testing bayesian samples and credible bands")
+        return
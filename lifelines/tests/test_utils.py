@@ -1,13 +1,18 @@
 from __future__ import print_function
+import os
+import time
+
 import numpy as np
 import pandas as pd
+import pytest
 
 from pandas.util.testing import assert_frame_equal
 import numpy.testing as npt
 
 from ..utils import group_survival_table_from_events, survival_table_from_events, survival_events_from_table, \
     datetimes_to_durations, k_fold_cross_validation, normalize, unnormalize,\
-    qth_survival_time, qth_survival_times, median_survival_times, concordance_index
+    qth_survival_time, qth_survival_times, median_survival_times, concordance_index, \
+    epanechnikov_kernel, banded_kernel_smoothing, EventTable
 from ..estimation import CoxPHFitter
 from ..datasets import load_regression_dataset, load_larynx, load_waltons
 
@@ -75,6 +80,22 @@ def test_qth_survival_times_with_multivariate_q():
     assert qth_survival_times(0.5, sf_multi_df['sf']) == 25
 
 
+def test_qth_survival_times_of_non_monotone_curves_are_the_first_crossings():
+    sf = pd.DataFrame({'a': [1.0, 0.4, 0.6, 0.3], 'b': [1.0, 0.9, 0.45, 0.8]}, index=[0, 5, 10, 15])
+    expected = pd.DataFrame([[15, 5, 5], [np.inf, 10, 10]], index=['a', 'b'], columns=[0.3, 0.45, 0.5])
+    assert_frame_equal(qth_survival_times([0.5, 0.45, 0.3, 0.5], sf), expected, check_dtype=False)
+
+
+def test_qth_survival_times_is_equal_to_the_first_crossing_of_each_curve():
+    sf = pd.DataFrame(np.cumprod(np.random.uniform(0.8, 1, size=(100, 5)), axis=0), index=np.arange(100) * 0.5)
+    q = np.random.uniform(0.3, 1, size=20)
+    times = qth_survival_times(q, sf)
+    for _q in q:
+        for column in sf:
+            crossed = sf[column] <= _q
+            assert times.ix[column, _q] == (crossed.idxmax() if crossed.any() else np.inf)
+
+
 def test_datetimes_to_durations_days():
     start_date = ['2013-10-10 0:00:00', '2013-10-09', '2012-10-10']
     end_date = ['2013-10-13', '2013-10-10 0:00:00', '2013-10-15']
@@ -126,6 +147,33 @@ def test_survival_table_to_events():
     npt.assert_array_equal(C, C_)
 
 
+def test_survival_table_to_events_in_chunks():
+    T, C = np.array([1, 2, 3, 4, 4, 5]), np.array([1, 0, 1, 1, 0, 1])
+    d = survival_table_from_events(T, C, np.zeros_like(T))
+    chunks = list(survival_events_from_table(d[['censored', 'observed']], chunksize=4))
+    assert [len(T_) for T_, _ in chunks] == [4, 2]
+    npt.assert_array_equal(np.concatenate([T_ for T_, _ in chunks]), T)
+    npt.assert_array_equal(np.concatenate([C_ for _, C_ in chunks]), C)
+
+
+def test_merged_event_tables_are_equal_to_the_event_table_of_all_events():
+    T, C = np.random.exponential(10, size=100), np.random.binomial(1, 0.5, size=100)
+    entry = np.random.uniform(0, 2, size=100)
+    shards = [EventTable(T[i:i + 25], C[i:i + 25], entry[i:i + 25]) for i in range(0, 100, 25)]
+    expected = survival_table_from_events(T, C, entry)
+    for merged in [shards[0].merge(*shards[1:]), shards[3].merge(shards[1]).merge(shards[2].merge(shards[0]))]:
+        npt.assert_array_equal(merged.table.index.values, expected.index.values)
+        npt.assert_array_almost_equal(merged.table.values, expected.values)
+
+
+def test_merged_event_tables_do_not_overflow_int32_counts():
+    columns = ['removed', 'observed', 'censored', 'entrance']
+    shard = pd.DataFrame([[0, 0, 0, 7 * 10 ** 8], [7 * 10 ** 8, 7 * 10 ** 8, 0, 0]], columns=columns,
+                         index=pd.Index([0, 1], name='event_at')).astype(np.int32)
+    merged = EventTable(table=shard).merge(*[EventTable(table=shard) for _ in range(3)])
+    npt.assert_array_equal(merged.table['entrance'].values, [28 * 10 ** 8, 0])
+
+
 def test_group_survival_table_from_events_on_waltons_data():
     df = load_waltons()
     first_obs = np.zeros(df.shape[0])
@@ -136,11 +184,62 @@ def test_group_survival_table_from_events_on_waltons_data():
     assert all(removed.index == censored.index)
 
 
-def test_survival_table_to_events_casts_to_float():
+def test_survival_table_from_integer_events_with_boolean_observations_has_int64_counts():
     T, C = np.array([1, 2, 3, 4, 4, 5]), np.array([True, False, True, True, True, True])
     d = survival_table_from_events(T, C, np.zeros_like(T))
-    npt.assert_array_equal(d['censored'].values, np.array([0.,  0.,  1.,  0.,  0.,  0.]))
-    npt.assert_array_equal(d['removed'].values, np.array([0.,  1.,  1.,  1.,  2.,  1.]))
+    assert all(dtype == np.int64 for dtype in d.dtypes)
+    npt.assert_array_equal(d['censored'].values, np.array([0, 0, 1, 0, 0, 0]))
+    npt.assert_array_equal(d['removed'].values, np.array([0, 1, 1, 1, 2, 1]))
+
+
+def test_survival_table_from_events_with_late_entries():
+    T, C = np.array([1, 2, 3, 4, 4, 5]), np.array([1, 0, 1, 1, 1, 1])
+    entry = np.array([0, 0, 2, 0, 1, 1])
+    d = survival_table_from_events(T, C, entry)
+    npt.assert_array_equal(d.index.values, np.array([0, 1, 2, 4, 5, 6]))
+    npt.assert_array_equal(d['removed'].values, np.array([0, 1, 1, 1, 2, 1]))
+    npt.assert_array_equal(d['observed'].values, np.array([0, 1, 0, 1, 2, 1]))
+    npt.assert_array_equal(d['censored'].values, np.array([0, 0, 1, 0, 0, 0]))
+    npt.assert_array_equal(d['entrance'].values, np.array([3, 2, 1, 0, 0, 0]))
+
+
+def test_survival_table_from_integer_events_has_integer_counts():
+    T, C = np.random.randint(0, 3650, size=500), np.random.binomial(1, 0.6, size=500)
+    entry = np.random.randint(0, 10, size=500)
+    d = survival_table_from_events(T, C, entry)
+    assert all(np.issubdtype(dtype, np.integer) for dtype in d.dtypes)
+    npt.assert_array_equal(d.values, survival_table_from_events(T.astype(float), C, entry.astype(float)).values)
+    npt.assert_array_equal(d.index.values, survival_table_from_events(T.astype(float), C, entry.astype(float)).index.values)
+
+
+def test_survival_table_from_integer_events_has_the_same_dtypes_however_sparse_the_times():
+    for T in [np.array([1, 2, 2, 5]), np.array([1, 5, 10 ** 9, 10 ** 9])]:
+        d = survival_table_from_events(T, np.ones_like(T), np.zeros_like(T))
+        assert all(dtype == np.int64 for dtype in d.dtypes)
+        assert d.index.dtype == np.int64
+
+
+def test_survival_table_from_events_with_late_entries_is_the_same_for_few_or_many_unique_float_times():
+    n = 2 ** 17
+    C = np.random.binomial(1, 0.6, size=n)
+    for n_times in [400, 10 ** 6]:
+        T, entry = np.random.randint(1, n_times, size=n), np.random.randint(0, n_times // 10, size=n)
+        expected = survival_table_from_events(T, C, entry)
+        d = survival_table_from_events(T / 4., C, entry / 4.)
+        npt.assert_array_equal(d.index.values, expected.index.values / 4.)
+        npt.assert_array_equal(d.values, expected.values)
+
+
+@pytest.mark.skipif("LIFELINES_BENCHMARK" not in os.environ, reason="benchmark, set LIFELINES_BENCHMARK to run")
+def test_report_survival_table_from_events_time():
+    # reports rather than asserts: wall-clock times are too noisy for the unit tests.
+    n = 10 ** 6
+    T, C, entry = np.random.exponential(10, size=n), np.random.binomial(1, 0.6, size=n), np.random.exponential(2, size=n)
+    for name, durations, entries in [('float times', T, np.zeros(n)), ('float times with late entries', T, entry),
+                                     ('float times on a grid with late entries', np.round(T * 4) / 4, np.round(entry * 4) / 4)]:
+        start = time.time()
+        survival_table_from_events(durations, C, entries)
+        print("survival_table_from_events of %d %s: %.2f sec" % (n, name, time.time() - start))
 
 
 def test_group_survival_table_from_events_works_with_series():
@@ -149,6 +248,15 @@ def test_group_survival_table_from_events_works_with_series():
     npt.assert_array_equal(ug, np.array([3, 2]))
 
 
+def test_banded_kernel_smoothing_is_equal_to_the_dense_kernel_product():
+    event_times = np.sort(np.random.binomial(30, 0.5, size=100) * 0.5)
+    timeline = np.linspace(0, 20, 77)
+    values = np.random.uniform(size=(100, 2))
+    for bandwidth in [0.5, 1., 5.]:
+        dense = np.dot(epanechnikov_kernel(timeline[:, None], event_times[None, :], bandwidth), values)
+        npt.assert_almost_equal(banded_kernel_smoothing(timeline, event_times, values, bandwidth), dense)
+
+
 def test_cross_validator_returns_k_results():
     cf = CoxPHFitter()
     results = k_fold_cross_validation(cf, load_regression_dataset(), duration_col='T', event_col='E', k=3)
@@ -7,8 +7,6 @@ import numpy as np
 import pandas as pd
 from pandas import to_datetime
 
-from lifelines._utils import concordance_index as _cindex
-
 
 def concordance_index(event_times, predicted_event_times, event_observed=None):
     """
@@ -62,6 +60,7 @@ def concordance_index(event_times, predicted_event_times, event_observed=None):
         event_observed = np.ones(event_times.shape[0], dtype=float)
 
     # 100 times faster to calculate in Fortran
+    from lifelines._utils import concordance_index as _cindex
     return _cindex(event_times,
                    predicted_event_times,
                    event_observed)
@@ -166,6 +165,10 @@ def survival_table_from_events(durations, event_observed, min_observations,
         columns: a 3-length array to call the, in order, removed individuals, observed deaths
           and censorships.
         weights: Default None, otherwise (n,1) array. Optional argument to use weights for individuals.
+
+    Integer durations and min_observations (and no weights) give int64 columns, and are counted
+    directly over their range of values if it is not too sparse. Their index is then int64 too.
+
     Returns:
         Pandas DataFrame with index as the unique times in event_times. The columns named
         'removed' refers to the number of individuals who were removed from the population
@@ -190,32 +193,85 @@ def survival_table_from_events(durations, event_observed, min_observations,
         15              2         2         0         0
 
     """
-    # deal with deaths and censorships
+    min_observations = np.asarray(min_observations).ravel()
+    event_observed = np.asarray(event_observed).ravel()
+    event_at = np.asarray(durations).ravel() + min_observations
+    n = event_at.shape[0]
+
+    if weights is None and n > 0 and _is_integer(event_at) and _is_integer(min_observations):
+        # discretized durations, ex: days. Count directly over the range of times if it is not too sparse.
+        start = min(event_at.min(), min_observations.min())
+        span = max(event_at.max(), min_observations.max()) - start + 1
+        if span <= 10 * n + 2 ** 16:
+            return _integer_survival_table(event_at - start, event_observed, min_observations - start, start, span, columns)
+
+    if not min_observations.any():
+        # no left truncation: everyone enters at time 0, so only the event times need sorting.
+        event_times, death_ix = _unique_inverse(event_at)
+        birth_time = np.searchsorted(event_times, 0)
+        if birth_time == event_times.shape[0] or event_times[birth_time] != 0:
+            event_times = np.insert(event_times, birth_time, 0)
+            death_ix[death_ix >= birth_time] += 1
+        birth_ix = np.repeat(birth_time, n)
+    else:
+        # one pass over the deaths and births together, rather than searching for each of them afterwards.
+        event_times, ix = _unique_inverse(np.r_[event_at, min_observations])
+        death_ix, birth_ix = ix[:n], ix[n:]
+
+    m = event_times.shape[0]
+    removed = np.bincount(death_ix, weights=None if weights is None else np.asarray(weights, dtype=float).ravel(), minlength=m)
+    observed = np.bincount(death_ix, weights=event_observed.astype(float), minlength=m)
+    censored = (removed - observed).astype(int)
+    entrance = np.bincount(birth_ix, minlength=m)
+
+    integer = weights is None and _is_integer(event_at) and _is_integer(min_observations)
+    event_table = pd.DataFrame(np.column_stack([removed, observed, censored, entrance]).astype(np.int64 if integer else float),
+                               index=pd.Index(event_times.astype(np.int64) if integer else event_times, name='event_at'),
+                               columns=columns)
+    return event_table
 
-    durations = np.asarray(durations) + min_observations
-    df = pd.DataFrame(durations, columns=["event_at"])
-    df[columns[0]] = 1 if weights is None else weights
-    df[columns[1]] = event_observed
-    death_table = df.groupby("event_at").sum()
-    death_table[columns[2]] = (death_table[columns[0]] - death_table[columns[1]]).astype(int)
 
-    # deal with late births
-    births = pd.DataFrame(min_observations, columns=['event_at'])
-    births[columns[3]] = 1
-    births_table = births.groupby('event_at').sum()
+def _is_integer(array):
+    return np.issubdtype(array.dtype, np.integer)
 
-    # this next line can be optimized for when min_observerations is all zeros.
-    event_table = death_table.join(births_table, how='outer', sort=True).fillna(0)  # http://wesmckinney.com/blog/?p=414
-    return event_table.astype(float)
+
+def _unique_inverse(values, sample_size=2 ** 16):
+    """
+    np.unique(values, return_inverse=True). If a sample of values has few unique ones, ex: times
+    rounded to a coarse grid, hashing the values and sorting only the unique ones is much faster
+    than sorting all of them.
+    """
+    sample = values[::max(1, values.shape[0] // sample_size)]
+    if values.shape[0] > sample_size and pd.unique(sample).shape[0] < sample.shape[0] // 16:
+        ix, unique = pd.factorize(values, sort=True)
+        if ix.min() >= 0:  # no missing values, which factorize leaves out.
+            return np.asarray(unique), ix
+    return np.unique(values, return_inverse=True)
 
 
-def survival_events_from_table(event_table, observed_deaths_col="observed", censored_col="censored"):
+def _integer_survival_table(event_at, event_observed, entry, start, span, columns):
+    """
+    survival_table_from_events for integer times shifted to [0, span), in O(n + span).
+    """
+    removed = np.bincount(event_at, minlength=span)
+    observed = np.bincount(event_at[event_observed.astype(bool)], minlength=span)
+    entrance = np.bincount(entry, minlength=span)
+
+    times = np.where((removed > 0) | (entrance > 0))[0]
+    counts = np.column_stack([removed[times], observed[times], removed[times] - observed[times], entrance[times]])
+    return pd.DataFrame(counts.astype(np.int64), index=pd.Index((times + start).astype(np.int64), name='event_at'),
+                        columns=columns)
+
+
+def survival_events_from_table(event_table, observed_deaths_col="observed", censored_col="censored", chunksize=None):
     """
     This is the inverse of the function ``survival_table_from_events``.
 
     Parameters
         event_table: a pandas DataFrame with index as the durations (!!) and columns "observed" and "censored", referring to
            the number of individuals that died and were censored at time t.
+        chunksize: if not None, return a generator of (T, C) pairs of at most chunksize individuals each,
+           rather than the whole population at once. Concatenated, the chunks are equal to (T, C).
 
     Returns
         T: a np.array of durations of observation -- one element for each individual in the population.
@@ -236,18 +292,86 @@ def survival_events_from_table(event_table, observed_deaths_col="observed", cens
         C = np.array([ 1.,  0.,  1.,  1.,  0.,  0.])
 
     """
-    columns = [observed_deaths_col, censored_col]
-    N = event_table[columns].sum().sum()
-    T = np.empty(N)
-    C = np.empty(N)
-    i = 0
-    for event_time, row in event_table.iterrows():
-        n = row[columns].sum()
-        T[i:i + n] = event_time
-        C[i:i + n] = np.r_[np.ones(row[columns[0]]), np.zeros(row[columns[1]])]
-        i += n
+    times, counts = _interleaved_event_counts(event_table, observed_deaths_col, censored_col)
+    if chunksize is not None:
+        return _survival_events_chunks(times, counts, int(chunksize))
+
+    flags = np.tile([1., 0.], times.shape[0] // 2)
+    return np.repeat(times, counts), np.repeat(flags, counts)
+
+
+def _interleaved_event_counts(event_table, observed_deaths_col, censored_col):
+    # every time appears twice: first with its deaths, then with its censorships.
+    times = np.asarray(event_table.index, dtype=float).repeat(2)
+    counts = np.empty(times.shape[0], dtype=int)
+    counts[0::2] = event_table[observed_deaths_col].values
+    counts[1::2] = event_table[censored_col].values
+    return times, counts
+
+
+def _survival_events_chunks(times, counts, chunksize):
+    assert chunksize > 0, 'chunksize must be positive.'
+    ends = counts.cumsum()
+    N = ends[-1] if ends.shape[0] else 0
+    flags = np.tile([1., 0.], times.shape[0] // 2)
+
+    for start in range(0, N, chunksize):
+        stop = min(start + chunksize, N)
+        # the rows that overlap with individuals [start, stop), and how many of theirs fall inside it.
+        lo = np.searchsorted(ends, start, side='right')
+        hi = np.searchsorted(ends, stop, side='left') + 1
+        n = counts[lo:hi].copy()
+        n[0] = min(ends[lo], stop) - start
+        if hi - lo > 1:
+            n[-1] = stop - (ends[hi - 2])
+        yield np.repeat(times[lo:hi], n), np.repeat(flags[lo:hi], n)
+
+
+class EventTable(object):
+
+    """
+    A survival table (see survival_table_from_events) that can be merged with other survival tables,
+    for example the tables of shards of a population. The KM and NA estimates only depend on the
+    counts in the table, so fitting from the merged table is exact:
+
+        table = EventTable(T1, C1).merge(EventTable(T2, C2), EventTable(T3, C3))
+        kmf.fit_from_event_table(table)
+
+    Parameters:
+      durations: an array of event times (durations individual was observed for)
+      event_observed: an array of booleans, 1 if observed event, 0 is censored event. Default all observed.
+      entry: an array of times the individuals entered the study, for left truncated data. Default all 0.
+
+    """
 
-    return T, C
+    def __init__(self, durations=None, event_observed=None, entry=None, table=None):
+        if table is None:
+            durations = np.asarray(durations).ravel()
+            if event_observed is None:
+                event_observed = np.ones(durations.shape[0], dtype=int)
+            if entry is None:
+                entry = np.zeros(durations.shape[0], dtype=durations.dtype if _is_integer(durations) else float)
+            table = survival_table_from_events(durations, event_observed, entry)
+        self.table = table
+
+    def merge(self, *others):
+        """
+        Returns a new EventTable with the counts of this table and of the others added at every time
+        in the (sorted) union of their times. Merging is associative and commutative.
+        """
+        tables = [self.table] + [other.table for other in others]
+        times = np.unique(np.concatenate([table.index.values for table in tables]))
+        # accumulate in 64 bits: the shards' tables may be int32, but their sum can pass 2 ** 31.
+        integer = all(_is_integer(table.values) for table in tables)
+        counts = np.zeros((times.shape[0], tables[0].shape[1]), dtype=np.int64 if integer else float)
+        for table in tables:
+            counts[np.searchsorted(times, table.index.values)] += table.values
+
+        table = pd.DataFrame(counts, index=pd.Index(times, name='event_at'), columns=tables[0].columns)
+        return EventTable(table=table)
+
+    def __repr__(self):
+        return "<lifelines.EventTable: %d times>" % self.table.shape[0]
 
 
 def datetimes_to_durations(start_times, end_times, fill_date=datetime.today(), freq='D', dayfirst=False, na_values=None):
@@ -402,6 +526,47 @@ def epanechnikov_kernel(t, T, bandwidth=1.):
     return M
 
 
+def banded_kernel_smoothing(timeline, event_times, values, bandwidth, kernel=epanechnikov_kernel):
+    """
+    Computes np.dot(kernel(timeline[:, None], event_times[None, :], bandwidth), values) for a kernel
+    that is zero outside (-bandwidth, bandwidth), like epanechnikov_kernel. Only the pairs of times
+    closer than the bandwidth are evaluated, so this costs O(n*w) rather than O(n*m), where w is the
+    number of event times within a bandwidth of a timeline point.
+
+    Parameters:
+      timeline: a (n,) array of times to evaluate the smoothed values at.
+      event_times: a (m,) array of the times of the values.
+      values: a (m,) or (m,d) array of values, ex: hazard jumps.
+      bandwidth: the bandwidth of the kernel.
+      kernel: a function of (t, T, bandwidth) applied elementwise. Default epanechnikov_kernel.
+
+    Returns:
+      a (n,) or (n,d) numpy array.
+    """
+    timeline = np.asarray(timeline, dtype=float)
+    event_times = np.asarray(event_times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    order = np.argsort(event_times, kind='mergesort')
+    event_times, values = event_times[order], values[order]
+    n = timeline.shape[0]
+
+    # the band is padded by a few ulps: the kernel itself zeroes the pairs on its boundary.
+    reach = bandwidth + 4 * np.spacing(np.abs(timeline) + bandwidth)
+    lower = np.searchsorted(event_times, timeline - reach, side='left')
+    upper = np.searchsorted(event_times, timeline + reach, side='right')
+    counts = upper - lower
+
+    # enumerate the (timeline, event time) pairs inside the band.
+    rows = np.repeat(np.arange(n), counts)
+    cols = np.arange(counts.sum()) + np.repeat(lower - (np.cumsum(counts) - counts), counts)
+    weights = kernel(timeline[rows], event_times[cols], bandwidth)
+
+    if values.ndim == 1:
+        return np.bincount(rows, weights=weights * values[cols], minlength=n)
+    return np.column_stack([np.bincount(rows, weights=weights * values[cols, j], minlength=n)
+                            for j in range(values.shape[1])])
+
+
 def significance_code(p):
     if p < 0.001:
         return '***'
@@ -417,36 +582,72 @@ def significance_code(p):
 
 def qth_survival_times(q, survival_functions):
     """
-    This can be done much better.
-
     Parameters:
-      q: a float between 0 and 1.
+      q: a float between 0 and 1, or an array of them.
       survival_functions: a (n,d) dataframe or numpy array.
         If dataframe, will return index values (actual times)
         If numpy array, will return indices.
 
     Returns:
-      v: if d==1, returns a float, np.inf if infinity.
-         if d > 1, an DataFrame containing the first times the value was crossed.
+      v: if d==1 and q is a float, returns a float, np.inf if infinity.
+         else, a DataFrame containing the first times the values were crossed, with one
+         row per survival function and one column per (unique) q.
 
     """
     q = pd.Series(q)
     assert (q <= 1).all() and (0 <= q).all(), 'q must be between 0 and 1'
     survival_functions = pd.DataFrame(survival_functions)
+    unique_q = np.unique(q.values)
+    positions = _qth_survival_positions(unique_q, survival_functions.values)
+    times = survival_functions.index.values
+
     if survival_functions.shape[1] == 1 and q.shape == (1,):
-        return survival_functions.apply(lambda s: qth_survival_time(q[0], s)).ix[0]
+        return _times_at(times, positions[0])[0]
     else:
-        return pd.DataFrame({_q: survival_functions.apply(lambda s: qth_survival_time(_q, s)) for _q in q})
+        return pd.DataFrame(dict((_q, _times_at(times, positions[i])) for i, _q in enumerate(unique_q)),
+                            index=survival_functions.columns, columns=unique_q)
+
+
+def _qth_survival_positions(q, survival_functions):
+    """
+    The row of the first value <= q of each column of the (n,d) array survival_functions, for every
+    value of the (n_q,) array q, as a (n_q, d) array. n if a column is never <= q.
+
+    All the columns and values of q are searched at once: a column is first <= q where its running
+    minimum is, and the negated running minimums are sorted. Replacing them with their ranks among
+    all the values makes every column a disjoint range of integer keys, so one searchsorted
+    finds every position exactly.
+    """
+    n, d = survival_functions.shape
+    q = np.asarray(q, dtype=float)
+    # NaNs are never <= q.
+    values = np.where(np.isnan(survival_functions), np.inf, survival_functions).astype(float)
+    running_min = np.minimum.accumulate(values, axis=0)
+
+    ranks, keys = np.unique(-running_min.T, return_inverse=True)
+    offsets = ranks.shape[0] * np.arange(d)
+    keys = keys.reshape(d * n) + np.repeat(offsets, n)
+
+    # -running_min >= -q <=> its rank is >= the rank -q would be inserted at.
+    q_keys = np.searchsorted(ranks, -q, side='left')[:, None] + offsets[None, :]
+    return np.searchsorted(keys, q_keys, side='left') - n * np.arange(d)[None, :]
+
+
+def _times_at(times, positions):
+    found = positions < times.shape[0]
+    if found.all():
+        return times[positions]
+    v = np.empty(positions.shape[0])
+    v[~found] = np.inf
+    v[found] = times[positions[found]]
+    return v
 
 
 def qth_survival_time(q, survival_function):
     """
     Expects a Pandas series, returns the time when the qth probability is reached.
     """
-    if survival_function.iloc[-1] > q:
-        return np.inf
-    v = (survival_function <= q).idxmax(0)
-    return v
+    return qth_survival_times(q, survival_function)
 
 
 def median_survival_times(survival_functions):